@@ -0,0 +1,142 @@
+"""
+  Command line entry point for the maintenance tasks that run outside of the API.
+
+  Usage: python -m app.cli precompute-forecasts [--horizon 90] [--concurrency 2]
+         python -m app.cli backtest [--forecasters ewma drift ridge lstm] [--symbols AAPL MSFT] [--folds 10]
+         python -m app.cli search [--samples 12] [--symbols AAPL MSFT] [--folds 3] [--dry-run]
+         python -m app.cli positions {rebuild,verify} [--portfolio PORTFOLIO_ID]
+         python -m app.cli indexes {ensure,stats} [--collections users assets]
+"""
+import argparse
+import asyncio
+import json
+
+from app.core.config import settings
+from app.core.indexes import INDEXES, ensure_indexes, index_stats
+from app.dependencies import get_forecast_scheduler
+from app.machine_learning.backtest import BacktestConfig, run_backtest
+from app.machine_learning.forecasters import FORECASTERS
+from app.machine_learning.search import SEARCH_SPACE, candidates, run_search
+from app.machine_learning.worker import ml_worker
+from app.repository.position import PositionRepository
+
+
+async def precompute_forecasts(args: argparse.Namespace) -> dict:
+    scheduler = get_forecast_scheduler()
+    scheduler.concurrency = args.concurrency
+    ml_worker.start()
+    try:
+        return await scheduler.run_once(horizon=args.horizon)
+    finally:
+        ml_worker.stop()
+
+
+async def backtest(args: argparse.Namespace) -> dict:
+    config = BacktestConfig(
+        horizon=args.horizon, folds=args.folds, step=args.step, min_train=args.min_train, max_epochs=args.max_epochs
+    )
+    report = run_backtest(args.forecasters, args.symbols, config, args.prices, args.workers)
+    if not args.details:
+        del report['results']
+    return report
+
+
+async def search(args: argparse.Namespace) -> dict:
+    config = BacktestConfig(
+        horizon=args.horizon, folds=args.folds, step=args.step, min_train=args.min_train, max_epochs=args.max_epochs
+    )
+    configurations = candidates(SEARCH_SPACE, args.samples, args.seed)
+    report = run_search(
+        configurations, args.symbols, config, args.prices, args.workers, args.tolerance, register=not args.dry_run
+    )
+    if not args.details:
+        del report['scores']
+    return report
+
+
+async def positions(args: argparse.Namespace) -> dict:
+    repository = PositionRepository()
+    if args.action == 'rebuild':
+        await ensure_indexes(['positions'])
+        return await repository.rebuild(args.portfolio)
+    return await repository.verify(args.portfolio)
+
+
+async def indexes(args: argparse.Namespace) -> dict:
+    if args.action == 'ensure':
+        return await ensure_indexes(args.collections)
+    return await index_stats(args.collections)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='PortfolioPulse maintenance tasks')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    precompute = commands.add_parser(
+        'precompute-forecasts',
+        help='Refresh the history, retrain the stale models and save the predictions of every held symbol'
+    )
+    precompute.add_argument('--horizon', type=int, default=settings.PREDICTION_MAX_HORIZON)
+    precompute.add_argument('--concurrency', type=int, default=settings.FORECAST_SCHEDULER_CONCURRENCY)
+    precompute.set_defaults(handler=precompute_forecasts)
+
+    walk_forward = commands.add_parser(
+        'backtest',
+        help='Walk-forward backtest of the forecasters over the local price history store'
+    )
+    walk_forward.add_argument('--forecasters', nargs='+', default=list(FORECASTERS),
+                              help=f'lstm or baselines: {", ".join(FORECASTERS)}')
+    walk_forward.add_argument('--symbols', nargs='+', help='Defaults to every stored symbol')
+    walk_forward.add_argument('--prices', default=settings.PRICE_HISTORY_DIR)
+    walk_forward.add_argument('--horizon', type=int, default=5)
+    walk_forward.add_argument('--folds', type=int, default=10)
+    walk_forward.add_argument('--step', type=int, default=20)
+    walk_forward.add_argument('--min-train', type=int, default=250)
+    walk_forward.add_argument('--max-epochs', type=int, help='Training epochs of the LSTM')
+    walk_forward.add_argument('--workers', type=int, help='Defaults to the number of CPUs')
+    walk_forward.add_argument('--details', action='store_true', help='Also print the result of every symbol')
+    walk_forward.set_defaults(handler=backtest)
+
+    hyperparameters = commands.add_parser(
+        'search',
+        help='Backtest LSTM configurations in parallel and register the Pareto-best one for the next trainings'
+    )
+    hyperparameters.add_argument('--samples', type=int, help='Random configurations to try, defaults to the full grid')
+    hyperparameters.add_argument('--seed', type=int, default=0)
+    hyperparameters.add_argument('--symbols', nargs='+', help='Defaults to every stored symbol')
+    hyperparameters.add_argument('--prices', default=settings.PRICE_HISTORY_DIR)
+    hyperparameters.add_argument('--horizon', type=int, default=5)
+    hyperparameters.add_argument('--folds', type=int, default=3)
+    hyperparameters.add_argument('--step', type=int, default=20)
+    hyperparameters.add_argument('--min-train', type=int, default=250)
+    hyperparameters.add_argument('--max-epochs', type=int, default=20, help='Training epochs of every configuration')
+    hyperparameters.add_argument('--workers', type=int, help='Defaults to the number of CPUs')
+    hyperparameters.add_argument('--tolerance', type=float, default=0.02,
+                                 help='Relative RMSE loss accepted for a smaller configuration')
+    hyperparameters.add_argument('--dry-run', action='store_true', help='Do not register the selected configuration')
+    hyperparameters.add_argument('--details', action='store_true', help='Also print the score of every configuration')
+    hyperparameters.set_defaults(handler=search)
+
+    snapshots = commands.add_parser(
+        'positions',
+        help='Rebuild the position snapshots from the transactions, or verify them against the transactions'
+    )
+    snapshots.add_argument('action', choices=['rebuild', 'verify'])
+    snapshots.add_argument('--portfolio', help='Defaults to every portfolio')
+    snapshots.set_defaults(handler=positions)
+
+    database_indexes = commands.add_parser(
+        'indexes',
+        help='Build the declared indexes of every collection, or report how often each index is used'
+    )
+    database_indexes.add_argument('action', choices=['ensure', 'stats'])
+    database_indexes.add_argument('--collections', nargs='+', choices=list(INDEXES),
+                                  help='Defaults to every collection')
+    database_indexes.set_defaults(handler=indexes)
+
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(args.handler(args)), indent=2, default=str))
+
+
+if __name__ == '__main__':
+    main()
@@ -10,4 +10,61 @@ class Settings:
   REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv('REFRESH_TOKEN', 7))
   FRONTEND_ORIGIN = os.getenv('FRONTEND_ORIGIN')
 
+  # Database
+  MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', 100))  # Per process and per server
+  MONGO_MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE', 0))
+  MONGO_MAX_IDLE_TIME_MS = int(os.getenv('MONGO_MAX_IDLE_TIME_MS', 0))  # 0 to keep the idle connections
+  MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', 0))  # 0 to wait for a free connection
+  MONGO_CONNECT_TIMEOUT_MS = int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', 10000))
+  MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', 10000))
+  MONGO_SOCKET_TIMEOUT_MS = int(os.getenv('MONGO_SOCKET_TIMEOUT_MS', 0))  # 0 to disable
+  MONGO_READ_PREFERENCE = os.getenv('MONGO_READ_PREFERENCE', 'primary')  # e.g. primaryPreferred, secondaryPreferred
+  MONGO_COMPRESSORS = os.getenv('MONGO_COMPRESSORS', 'zlib')  # e.g. zstd,snappy,zlib, empty to disable
+  MONGO_APP_NAME = os.getenv('MONGO_APP_NAME', 'portfoliopulse-api')
+
+  # Market data
+  QUOTE_CACHE_TTL_SECONDS = float(os.getenv('QUOTE_CACHE_TTL_SECONDS', 60))
+  QUOTE_CACHE_MAX_SIZE = int(os.getenv('QUOTE_CACHE_MAX_SIZE', 1024))
+  QUOTE_CACHE_BACKEND = os.getenv('QUOTE_CACHE_BACKEND', 'memory')  # memory | mongo
+  QUOTE_BATCH_SIZE = int(os.getenv('QUOTE_BATCH_SIZE', 50))
+  PRICE_HISTORY_DIR = os.getenv('PRICE_HISTORY_DIR', 'data/prices')
+  PRICE_HISTORY_START = os.getenv('PRICE_HISTORY_START', '2018-01-01')
+  PRICE_HISTORY_REFRESH_SECONDS = float(os.getenv('PRICE_HISTORY_REFRESH_SECONDS', 3600))
+
+  # Machine learning
+  TRAINING_MAX_EPOCHS = int(os.getenv('TRAINING_MAX_EPOCHS', 80))
+  TRAINING_PATIENCE = int(os.getenv('TRAINING_PATIENCE', 5))
+  TRAINING_TIME_BUDGET_SECONDS = float(os.getenv('TRAINING_TIME_BUDGET_SECONDS', 300))  # 0 to disable
+  TRAINING_BATCH_SIZE = int(os.getenv('TRAINING_BATCH_SIZE', 16))
+  TRAINING_VALIDATION_SPLIT = float(os.getenv('TRAINING_VALIDATION_SPLIT', 0.2))
+  MODEL_REGISTRY_DIR = os.getenv('MODEL_REGISTRY_DIR', 'data/models')
+  MODEL_CACHE_SIZE = int(os.getenv('MODEL_CACHE_SIZE', 16))
+  MODEL_MAX_AGE_DAYS = int(os.getenv('MODEL_MAX_AGE_DAYS', 1))
+  MODEL_REGISTRY_KEEP = int(os.getenv('MODEL_REGISTRY_KEEP', 2))
+  MODEL_TRAINING_MODE = os.getenv('MODEL_TRAINING_MODE', 'per_symbol')  # per_symbol | shared
+  MODEL_SHARED_BATCH_SIZE = int(os.getenv('MODEL_SHARED_BATCH_SIZE', 256))
+  MODEL_FINE_TUNE_ENABLED = os.getenv('MODEL_FINE_TUNE_ENABLED', 'true').lower() == 'true'
+  MODEL_FINE_TUNE_MAX_NEW_BARS = int(os.getenv('MODEL_FINE_TUNE_MAX_NEW_BARS', 20))
+  MODEL_FINE_TUNE_EPOCHS = int(os.getenv('MODEL_FINE_TUNE_EPOCHS', 5))
+  MODEL_FINE_TUNE_TOLERANCE = float(os.getenv('MODEL_FINE_TUNE_TOLERANCE', 0.1))
+  ML_WORKER_PROCESSES = int(os.getenv('ML_WORKER_PROCESSES', 1))
+  ML_WORKER_TIMEOUT_SECONDS = float(os.getenv('ML_WORKER_TIMEOUT_SECONDS', 900))
+  PREDICTION_MAX_HORIZON = int(os.getenv('PREDICTION_MAX_HORIZON', 90))
+  PREDICTION_FALLBACK_FORECASTER = os.getenv('PREDICTION_FALLBACK_FORECASTER', 'drift')  # empty to disable
+  PREDICTION_TTL_SECONDS = float(os.getenv('PREDICTION_TTL_SECONDS', 86400))
+  PREDICTION_RETENTION_SECONDS = float(os.getenv('PREDICTION_RETENTION_SECONDS', 7 * 86400))
+  PREDICTION_STALE_WHILE_REVALIDATE = os.getenv('PREDICTION_STALE_WHILE_REVALIDATE', 'true').lower() == 'true'
+
+  # Forecast scheduler
+  FORECAST_SCHEDULER_ENABLED = os.getenv('FORECAST_SCHEDULER_ENABLED', 'false').lower() == 'true'
+  FORECAST_SCHEDULER_HOUR = int(os.getenv('FORECAST_SCHEDULER_HOUR', 2))  # UTC
+  FORECAST_SCHEDULER_CONCURRENCY = int(os.getenv('FORECAST_SCHEDULER_CONCURRENCY', 2))
+
+  # Executors
+  IO_EXECUTOR_WORKERS = int(os.getenv('IO_EXECUTOR_WORKERS', 16))
+
+  # Background jobs
+  JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+  JOB_HISTORY_SIZE = int(os.getenv('JOB_HISTORY_SIZE', 1000))
+
 settings = Settings()
@@ -1,7 +1,13 @@
 import os
-from motor.motor_asyncio import AsyncIOMotorClient
+import threading
+from typing import Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
+from pymongo import monitoring
 # from pymongo.errors import ConnectionFailure
 
+from app.core.config import settings
+
 MONGO_URI = os.getenv("MONGO_URI", None)
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
 
@@ -15,5 +21,185 @@ def get_databse_name():
   else:
     raise ValueError(f"Unknown environment: {ENVIRONMENT}")
 
-client = AsyncIOMotorClient(MONGO_URI)
-db = client.get_database(get_databse_name())
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+  """
+  Count the connections of the client pools, from the events published by the driver threads.
+  The driver has one pool per server, so the checked out connections are counted per server address.
+  """
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self.open = 0
+    self.checked_out: dict[str, int] = {}
+    self.peak_checked_out: dict[str, int] = {}
+    self.checkouts = 0
+    self.checkout_failures = 0
+    self.pools_cleared = 0
+
+  def pool_created(self, event):
+    pass
+
+  def pool_ready(self, event):
+    pass
+
+  def pool_cleared(self, event):
+    with self._lock:
+      self.pools_cleared += 1
+
+  def pool_closed(self, event):
+    pass
+
+  def connection_created(self, event):
+    with self._lock:
+      self.open += 1
+
+  def connection_ready(self, event):
+    pass
+
+  def connection_closed(self, event):
+    with self._lock:
+      self.open -= 1
+
+  def connection_check_out_started(self, event):
+    pass
+
+  def connection_check_out_failed(self, event):
+    with self._lock:
+      self.checkout_failures += 1
+
+  def connection_checked_out(self, event):
+    server = '%s:%s' % event.address
+    with self._lock:
+      self.checkouts += 1
+      self.checked_out[server] = self.checked_out.get(server, 0) + 1
+      self.peak_checked_out[server] = max(self.peak_checked_out.get(server, 0), self.checked_out[server])
+
+  def connection_checked_in(self, event):
+    server = '%s:%s' % event.address
+    with self._lock:
+      self.checked_out[server] = self.checked_out.get(server, 0) - 1
+
+  def servers(self, max_pool_size: int) -> dict:
+    """
+    Get the usage of the pool of every server
+    :param max_pool_size: Size limit of each pool
+    :return: dict mapping each server address to its checked out connections, peak and utilization
+    """
+    with self._lock:
+      return {
+        server: {
+          'checked_out': checked_out,
+          'peak_checked_out': self.peak_checked_out[server],
+          # A value close to 1 means the requests queue for a connection to this server
+          'utilization': checked_out / max_pool_size if max_pool_size else 0.0,
+        }
+        for server, checked_out in self.checked_out.items()
+      }
+
+
+class CollectionProxy:
+  """
+  Collection of the current client, so the app-scoped repositories keep working after the client is recreated
+  """
+
+  def __init__(self, database: 'Database', name: str):
+    self._database = database
+    self._name = name
+
+  def __getattr__(self, attribute: str):
+    return getattr(self._database.collection(self._name), attribute)
+
+
+class Database:
+  """
+  Application-scoped Mongo client, created with the pool settings on startup and closed on shutdown.
+  The repositories get their collections from it; it connects on first use outside of the API (e.g. the CLI).
+  """
+
+  def __init__(self, uri: Optional[str], name: str):
+    self.uri = uri
+    self.name = name
+    self.monitor = PoolMonitor()
+    self._client: Optional[AsyncIOMotorClient] = None
+    self._collections: dict[str, AsyncIOMotorCollection] = {}
+    self._lock = threading.Lock()
+
+  @property
+  def client(self) -> AsyncIOMotorClient:
+    with self._lock:
+      if self._client is None:
+        self._client = AsyncIOMotorClient(
+          self.uri,
+          maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
+          minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+          maxIdleTimeMS=settings.MONGO_MAX_IDLE_TIME_MS or None,
+          waitQueueTimeoutMS=settings.MONGO_WAIT_QUEUE_TIMEOUT_MS or None,
+          connectTimeoutMS=settings.MONGO_CONNECT_TIMEOUT_MS,
+          serverSelectionTimeoutMS=settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+          socketTimeoutMS=settings.MONGO_SOCKET_TIMEOUT_MS or None,
+          readPreference=settings.MONGO_READ_PREFERENCE,
+          compressors=settings.MONGO_COMPRESSORS or None,
+          appname=settings.MONGO_APP_NAME,
+          event_listeners=[self.monitor]
+        )
+      return self._client
+
+  def collection(self, name: str) -> AsyncIOMotorCollection:
+    """
+    Get a collection of the application database from the current client
+    :param name: str
+    :return: AsyncIOMotorCollection
+    """
+    collection = self._collections.get(name)
+    if collection is None:
+      collection = self.client.get_database(self.name).get_collection(name)
+      self._collections[name] = collection
+    return collection
+
+  def get_collection(self, name: str) -> CollectionProxy:
+    """
+    Get a collection of the application database, bound to the client in use when it is accessed
+    :param name: str
+    :return: CollectionProxy
+    """
+    return CollectionProxy(self, name)
+
+  async def connect(self) -> None:
+    """
+    Create the client and check the server is reachable, opening the minimum number of pooled connections
+    :raises ConnectionFailure: If no server could be selected before the timeout
+    """
+    await self.client.admin.command('ping')
+
+  def close(self) -> None:
+    """
+    Close the pooled connections, the next use creates a new client
+    """
+    with self._lock:
+      if self._client is not None:
+        self._client.close()
+        self._client = None
+        self._collections.clear()
+
+  def stats(self) -> dict:
+    """
+    Get the connection pool counters of this process
+    :return: dict
+    """
+    monitor = self.monitor
+    servers = monitor.servers(settings.MONGO_MAX_POOL_SIZE)
+    return {
+      'connected': self._client is not None,
+      'max_pool_size': settings.MONGO_MAX_POOL_SIZE,
+      'open': monitor.open,
+      'servers': servers,
+      # Utilization of the busiest pool
+      'max_utilization': max((server['utilization'] for server in servers.values()), default=0.0),
+      'checkouts': monitor.checkouts,
+      'checkout_failures': monitor.checkout_failures,
+      'pools_cleared': monitor.pools_cleared,
+    }
+
+
+db = Database(MONGO_URI, get_databse_name())
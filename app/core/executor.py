@@ -0,0 +1,133 @@
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from app.core.config import settings
+
+
+class ManagedExecutor:
+    """
+    Wrapper around a concurrent.futures pool that runs blocking work off the event loop,
+    keeps track of the queue depth and lets awaiting requests cancel work that did not start yet.
+    """
+
+    def __init__(self, name: str, factory: Callable[[int], Executor], max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self._factory = factory
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+
+    @property
+    def pool(self) -> Executor:
+        """
+        Create the pool on first use, so importing the module does not start any worker
+        """
+        with self._lock:
+            if self._pool is None:
+                self._pool = self._factory(self.max_workers)
+            return self._pool
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        """
+        Submit a blocking call to the pool
+        :param func: Callable, must be picklable for process pools
+        :return: concurrent.futures.Future
+        """
+        if kwargs:
+            func = functools.partial(func, **kwargs)
+        future = self.pool.submit(func, *args)
+        with self._lock:
+            self.submitted += 1
+        future.add_done_callback(self._on_done)
+        return future
+
+    async def run(self, func: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Run a blocking call in the pool and await its result.
+        Cancelling the awaiting task (or reaching the timeout) cancels the call if it is still queued.
+        :param func: Callable
+        :param timeout: Optional timeout in seconds
+        :return: The result of the call
+        """
+        future = asyncio.wrap_future(self.submit(func, *args, **kwargs))
+        if timeout is None:
+            return await future
+        return await asyncio.wait_for(future, timeout)
+
+    def _on_done(self, future: Future) -> None:
+        with self._lock:
+            if future.cancelled():
+                self.cancelled += 1
+            elif future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    def stats(self) -> dict:
+        """
+        Get the executor counters
+        :return: dict
+        """
+        with self._lock:
+            in_flight = self.submitted - self.completed - self.failed - self.cancelled
+            return {
+                'max_workers': self.max_workers,
+                'started': self._pool is not None,
+                'submitted': self.submitted,
+                'in_flight': in_flight,
+                'queue_depth': max(0, in_flight - self.max_workers),
+                'completed': self.completed,
+                'failed': self.failed,
+                'cancelled': self.cancelled,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the pool and cancel every queued call
+        :param wait: Wait for the running calls to finish
+        """
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            logging.info(f'Shutting down {self.name} executor')
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+
+def _thread_pool(max_workers: int) -> Executor:
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='io-worker')
+
+
+# Network I/O such as yfinance calls
+io_executor = ManagedExecutor('io', _thread_pool, settings.IO_EXECUTOR_WORKERS)
+
+
+async def run_io(func: Callable, *args, **kwargs) -> Any:
+    """
+    Run a blocking I/O call in the I/O thread pool
+    """
+    return await io_executor.run(func, *args, **kwargs)
+
+
+def executors_stats() -> dict:
+    """
+    Get the counters of every executor
+    :return: dict
+    """
+    return {
+        'io': io_executor.stats(),
+    }
+
+
+def shutdown_executors(wait: bool = True) -> None:
+    """
+    Stop every executor
+    """
+    io_executor.shutdown(wait=wait)
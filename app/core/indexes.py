@@ -0,0 +1,101 @@
+"""
+  Indexes of every collection, declared in one place and built at startup (or with `python -m app.cli indexes`).
+  Creating an index that already exists with the same keys and options is a no-op, so building them is idempotent.
+"""
+import logging
+from typing import Optional
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from app.core.database import db
+
+
+def _unique(field: str, field_type: str = 'string') -> IndexModel:
+    # Only the documents having the field are unique, so the existing documents without it do not collide
+    return IndexModel(
+        [(field, ASCENDING)], unique=True, partialFilterExpression={field: {'$type': field_type}}
+    )
+
+
+INDEXES: dict[str, list[IndexModel]] = {
+    'users': [
+        _unique('username'),
+        _unique('email'),
+    ],
+    'portfolios': [
+        IndexModel([('user_id', ASCENDING)]),
+    ],
+    'assets': [
+        _unique('symbol'),
+        IndexModel([('portfolio_ids', ASCENDING)]),
+    ],
+    'transactions': [
+        # Also serves the queries on the portfolio_id alone
+        IndexModel([('portfolio_id', ASCENDING), ('asset_id', ASCENDING)]),
+    ],
+    'positions': [
+        IndexModel([('portfolio_id', ASCENDING), ('asset_id', ASCENDING)], unique=True),
+    ],
+    'predictions': [
+        # The latest prediction of a symbol for a period
+        IndexModel([('symbol', ASCENDING), ('predicated_days', ASCENDING), ('updated_at', DESCENDING)]),
+        # Delete the predictions once their purge date is reached
+        IndexModel([('purge_at', ASCENDING)], expireAfterSeconds=0),
+    ],
+    'quotes': [
+        # Delete the cached quotes once expired
+        IndexModel([('expires_at', ASCENDING)], expireAfterSeconds=0),
+    ],
+    'leases': [
+        # Delete the leases once expired
+        IndexModel([('expires_at', ASCENDING)], expireAfterSeconds=0),
+    ],
+}
+
+
+async def ensure_indexes(collections: Optional[list[str]] = None, database=db) -> dict:
+    """
+    Build the declared indexes one by one, a failing index does not stop the others
+    :param collections: Collections to index, defaults to every collection of INDEXES
+    :param database: Motor database
+    :return: dict mapping each collection to its indexes, each one 'ok' or the error that prevented building it
+    """
+    report = {}
+    for name in collections or INDEXES:
+        collection = database.get_collection(name)
+        report[name] = {}
+        for index in INDEXES[name]:
+            try:
+                await collection.create_indexes([index])
+                report[name][index.document['name']] = 'ok'
+            except Exception as e:
+                # E.g. duplicate values preventing a unique index, or an index existing with other options
+                logging.error(f"Error creating the index {index.document['name']} of {name}: {e}")
+                report[name][index.document['name']] = str(e)
+    return report
+
+
+async def index_stats(collections: Optional[list[str]] = None, database=db) -> dict:
+    """
+    Report how often every index was used since the server started, with $indexStats
+    :param collections: Collections to report, defaults to every collection of INDEXES
+    :param database: Motor database
+    :return: dict mapping each collection to its indexes (name, keys, number of uses, since when), least used first
+    """
+    report = {}
+    for name in collections or INDEXES:
+        try:
+            stats = [
+                {
+                    'name': index['name'],
+                    'key': dict(index['key']),
+                    'ops': index['accesses']['ops'],
+                    'since': index['accesses']['since'],
+                }
+                async for index in database.get_collection(name).aggregate([{'$indexStats': {}}])
+            ]
+            report[name] = sorted(stats, key=lambda index: index['ops'])
+        except Exception as e:
+            logging.error(f'Error reading the {name} index stats: {e}')
+            report[name] = {'error': str(e)}
+    return report
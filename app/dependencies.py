@@ -1,54 +1,87 @@
+from functools import lru_cache
+
 from fastapi import Security
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
+from app.core.config import settings
+
 from app.repository.asset import AssetRepository
+from app.repository.lease import LeaseRepository
 from app.repository.portfolio import PortfolioRepository
+from app.repository.position import PositionRepository
 from app.repository.prediction import PredictionRepository
 from app.repository.transaction import TransactionRepository
 from app.repository.user import UserRepository
 from app.services.asset import AssetService
+from app.services.job import JobService, job_service
 from app.services.portfolio import PortfolioService
 from app.services.prediction import PredictionService
+from app.services.scheduler import ForecastScheduler
 from app.services.transaction import TransactionService
 from app.services.user import UserService
 from app.utils.jwt import AuthHandler
 
 
+# The repositories and services are stateless apart from their collections, which are bound to the application
+# Mongo client, so every request shares the same app-scoped instances instead of building them again
+@lru_cache
 def get_user_service() -> UserService:
     user_repository = UserRepository()
     return UserService(repository=user_repository)
 
+@lru_cache
+def get_auth_handler() -> AuthHandler:
+    return AuthHandler(get_user_service())
+
 def get_current_user(auth: HTTPAuthorizationCredentials = Security(HTTPBearer())):
-    user_service = get_user_service()
-    auth_handler = AuthHandler(user_service)
-    return auth_handler.get_current_user(auth)
+    return get_auth_handler().get_current_user(auth)
 
 
-def get_portfolio_service():
+@lru_cache
+def get_position_repository() -> PositionRepository:
+    return PositionRepository()
+
+@lru_cache
+def get_portfolio_service() -> PortfolioService:
     portfolio_repository = PortfolioRepository()
     return PortfolioService(
         portfolio_repository=portfolio_repository,
-        asset_service=get_asset_service()
+        asset_service=get_asset_service(),
+        position_repository=get_position_repository()
     )
 
-def get_asset_service():
+@lru_cache
+def get_asset_service() -> AssetService:
     asset_repository = AssetRepository()
     return AssetService(repository=asset_repository)
 
-def get_transaction_service():
+@lru_cache
+def get_transaction_service() -> TransactionService:
     """
     @TODO: Need to be reviewed
     """
     transaction_repository = TransactionRepository()
-    portfolio_repository = PortfolioRepository()
-    asset_repository = AssetRepository()
-    portfolio_service = PortfolioService(portfolio_repository, asset_repository)
-    asset_service = AssetService(asset_repository)
-    return TransactionService(transaction_repository, portfolio_service, asset_service)
+    portfolio_service = get_portfolio_service()
+    asset_service = get_asset_service()
+    return TransactionService(
+        transaction_repository, portfolio_service, asset_service, position_repository=get_position_repository()
+    )
 
-def get_prediction_service():
-    portfolio_repository = PortfolioRepository()
-    asset_repository = AssetRepository()
-    portfolio_service = PortfolioService(portfolio_repository, asset_repository)
+@lru_cache
+def get_prediction_service() -> PredictionService:
+    portfolio_service = get_portfolio_service()
     prediction_repository = PredictionRepository()
     return PredictionService(prediction_repository, portfolio_service)
+
+def get_job_service() -> JobService:
+    return job_service
+
+@lru_cache
+def get_forecast_scheduler() -> ForecastScheduler:
+    return ForecastScheduler(
+        asset_repository=get_asset_service().repository,
+        prediction_service=get_prediction_service(),
+        lease_repository=LeaseRepository(),
+        concurrency=settings.FORECAST_SCHEDULER_CONCURRENCY,
+        hour=settings.FORECAST_SCHEDULER_HOUR
+    )
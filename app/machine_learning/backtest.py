@@ -0,0 +1,208 @@
+"""
+  Walk-forward backtests of the forecasters over the local price history store.
+  For each symbol, the forecaster is fitted on the prices up to an origin, predicts the next `horizon` prices,
+  and the origin moves forward `step` days, `folds` times. The (symbol, forecaster) pairs run in parallel
+  in spawned processes, each one reading its prices from the memory-mapped store. Every pair runs in a fresh process,
+  so its peak RSS is its own and not the one of a previous TensorFlow backtest.
+"""
+import multiprocessing
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, replace
+from typing import Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.machine_learning.data_processing import calculate_mse
+from app.machine_learning.evaluation import evaluate_predictions
+from app.machine_learning.forecasters import Forecaster, get_forecaster
+from app.repository.price_history import PriceHistoryRepository
+
+
+@dataclass(frozen=True)
+class BacktestConfig:
+    """
+    Walk-forward schedule: `folds` origins, `step` days apart, the last one `horizon` days before the last price.
+    """
+    horizon: int = 5
+    folds: int = 10
+    step: int = 20
+    min_train: int = 250
+    max_epochs: Optional[int] = None  # Overrides the training epochs of the LSTM
+
+
+def make_forecaster(name: str, config: BacktestConfig, params: Optional[dict] = None) -> Forecaster:
+    """
+    Build a forecaster by name, "lstm" included
+    :param name: str
+    :param config: BacktestConfig
+    :param params: Hyperparameters of the LSTM (units, dropout, dense_units, look_back), defaults to the registered ones
+    :return: Forecaster
+    """
+    if name != 'lstm':
+        return get_forecaster(name)
+
+    # Only the processes backtesting the LSTM load TensorFlow
+    from app.machine_learning.lstm import DEFAULT_ARCHITECTURE, DEFAULT_LOOK_BACK, LSTMForecaster
+    from app.machine_learning.training import DEFAULT_TRAINING, LSTMArchitecture
+
+    training = replace(DEFAULT_TRAINING, max_epochs=config.max_epochs) if config.max_epochs else DEFAULT_TRAINING
+    if not params:
+        return LSTMForecaster(training=training)
+    architecture = LSTMArchitecture(
+        units=tuple(params.get('units', DEFAULT_ARCHITECTURE.units)),
+        dropout=params.get('dropout', DEFAULT_ARCHITECTURE.dropout),
+        dense_units=params.get('dense_units', DEFAULT_ARCHITECTURE.dense_units)
+    )
+    return LSTMForecaster(training, params.get('look_back', DEFAULT_LOOK_BACK), architecture)
+
+
+def limit_threads(threads: int) -> None:
+    """
+    Initializer of the backtest processes: read by TensorFlow when it is loaded, so the processes running in parallel
+    do not oversubscribe the CPUs
+    :param threads: Threads of each process
+    """
+    os.environ['TF_NUM_INTRAOP_THREADS'] = str(threads)
+    os.environ['TF_NUM_INTEROP_THREADS'] = '1'
+
+
+def process_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Pool of the backtest processes, shared by the backtests and the hyperparameter search.
+    Spawn instead of fork, as TensorFlow is not fork safe, and one task per process, so neither the TensorFlow state
+    nor the peak RSS of a task carries over to the next one.
+    :param workers: Number of processes
+    :return: ProcessPoolExecutor
+    """
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=limit_threads, initargs=(max(1, os.cpu_count() // workers),),
+                               max_tasks_per_child=1)
+
+
+def walk_forward_origins(length: int, config: BacktestConfig) -> list[int]:
+    """
+    Get the indexes of the first predicted price of every fold
+    :param length: Number of prices
+    :param config: BacktestConfig
+    :return: list[int], oldest first
+    """
+    last = length - config.horizon
+    origins = [last - fold * config.step for fold in range(config.folds)]
+    return sorted(origin for origin in origins if origin >= config.min_train)
+
+
+def backtest_symbol(
+    root: str, symbol: str, forecaster_name: str, config: BacktestConfig, params: Optional[dict] = None
+) -> dict:
+    """
+    Walk-forward backtest of a forecaster on one symbol, run in a worker process.
+    :param root: Directory of the price history store
+    :param symbol: str
+    :param forecaster_name: str
+    :param config: BacktestConfig
+    :param params: Hyperparameters of the LSTM, see make_forecaster
+    :return: Metrics, time and memory of the backtest
+    """
+    bars = PriceHistoryRepository(root).load(symbol)
+    prices = np.asarray(bars['close'], dtype=np.float64) if bars is not None else np.empty(0)
+    origins = walk_forward_origins(len(prices), config)
+    result = {'symbol': symbol, 'forecaster': forecaster_name, 'folds': len(origins)}
+    if not origins:
+        return {**result, 'error': f'Not enough prices ({len(prices)}) for a walk-forward backtest...'}
+
+    actual, predicted = [], []
+    fit_seconds = predict_seconds = 0.0
+    try:
+        for origin in origins:
+            forecaster = make_forecaster(forecaster_name, config, params)
+            start = time.perf_counter()
+            forecaster.fit(prices[:origin])
+            fit_seconds += time.perf_counter() - start
+
+            # Warm up, so the latency excludes the one-off tracing of the LSTM forward pass
+            forecaster.predict(1)
+            start = time.perf_counter()
+            predicted.append(forecaster.predict(config.horizon))
+            predict_seconds += time.perf_counter() - start
+            actual.append(prices[origin:origin + config.horizon])
+    except Exception as e:
+        return {**result, 'error': str(e)}
+
+    actual, predicted = np.concatenate(actual), np.concatenate(predicted)
+    metrics = evaluate_predictions(actual, predicted)
+    return {
+        **result,
+        'RMSE': float(metrics['RMSE']),
+        'MAE': float(metrics['MAE']),
+        'R2': float(metrics['R2']),
+        'MSE': float(calculate_mse(actual, predicted)),
+        'fit_seconds': fit_seconds,
+        'predict_ms': predict_seconds / len(origins) * 1000,
+        # Peak RSS of the process, TensorFlow allocates most of its memory in native code
+        'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def summarize(results: list[dict]) -> dict:
+    """
+    Average the metrics of every forecaster over the symbols it could be backtested on
+    :param results: Results of backtest_symbol
+    :return: dict mapping each forecaster to its summary
+    """
+    summary = {}
+    for name in dict.fromkeys(result['forecaster'] for result in results):
+        succeeded = [result for result in results if result['forecaster'] == name and 'error' not in result]
+        failed = [result['symbol'] for result in results if result['forecaster'] == name and 'error' in result]
+        summary[name] = {'symbols': len(succeeded), 'failed': failed}
+        if not succeeded:
+            continue
+        for metric in ('RMSE', 'MAE', 'R2', 'MSE', 'predict_ms'):
+            summary[name][metric] = float(np.mean([result[metric] for result in succeeded]))
+        summary[name]['fit_seconds'] = float(np.sum([result['fit_seconds'] for result in succeeded]))
+        summary[name]['max_rss_mb'] = float(np.max([result['max_rss_mb'] for result in succeeded]))
+    return summary
+
+
+def run_backtest(
+    forecasters: list[str],
+    symbols: Optional[list[str]] = None,
+    config: BacktestConfig = BacktestConfig(),
+    root: str = settings.PRICE_HISTORY_DIR,
+    workers: Optional[int] = None
+) -> dict:
+    """
+    Backtest forecasters over many symbols of the price history store, in parallel across processes.
+    :param forecasters: Names of the forecasters ("lstm" or a baseline)
+    :param symbols: Symbols to backtest on, defaults to every stored symbol
+    :param config: BacktestConfig
+    :param root: Directory of the price history store
+    :param workers: Number of processes, defaults to the number of CPUs
+    :return: dict with the configuration, the summary of every forecaster and the result of every symbol
+    """
+    for name in forecasters:
+        if name != 'lstm':
+            get_forecaster(name)
+    symbols = symbols or PriceHistoryRepository(root).symbols()
+
+    workers = workers or os.cpu_count()
+
+    start = time.perf_counter()
+    results = []
+    with process_pool(workers) as pool:
+        futures = [
+            pool.submit(backtest_symbol, root, symbol, name, config) for name in forecasters for symbol in symbols
+        ]
+        for future in as_completed(futures):
+            results.append(future.result())
+
+    results.sort(key=lambda result: (forecasters.index(result['forecaster']), result['symbol']))
+    return {
+        'config': asdict(config),
+        'seconds': time.perf_counter() - start,
+        'summary': summarize(results),
+        'results': results,
+    }
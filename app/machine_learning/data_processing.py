@@ -1,22 +1,56 @@
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from sklearn.preprocessing import MinMaxScaler
 
-def prepare_lstm_data(data: np.array, look_back: int = 60) -> tuple:
+def prepare_lstm_data(
+    data: np.array,
+    look_back: int = 60,
+    target_index: int = 0,
+    materialize: bool = False,
+    scaler: MinMaxScaler = None
+) -> tuple:
     """
     Prepare data for LSTM by creating sequences of input-output pairs.
-    :param data: List of prices (e.g., closing prices).
+    The sequences are strided views on the scaled data, so no look_back sized copy is made unless asked.
+    :param data: Prices, either 1-D (e.g., closing prices) or 2-D with one column per feature (e.g., OHLCV).
     :param look_back: Number of historical days to consider for each prediction.
-    :return: Tuple of formatted data (X, Y) and the scaler for inverse transformation.
+    :param target_index: Column of the feature to predict when the data has several features.
+    :param materialize: Return X as a contiguous array instead of a view.
+    :param scaler: Scaler already fitted (e.g. the scaler of a saved model), used instead of fitting a new one.
+    :return: Tuple of formatted float32 data (X of shape (samples, look_back, features), Y of shape (samples,))
+             and the scaler for inverse transformation.
     """
-    scaler = MinMaxScaler(feature_range=(0, 1))
-    data_scaled = scaler.fit_transform(np.array(data).reshape(-1, 1))
+    data = np.asarray(data, dtype=np.float64)
+    if data.ndim == 1:
+        data = data.reshape(-1, 1)
+    if len(data) <= look_back:
+        raise ValueError(f'At least {look_back + 1} prices are needed, got {len(data)}...')
+
+    if scaler is None:
+        scaler = MinMaxScaler(feature_range=(0, 1))
+        data_scaled = scaler.fit_transform(data).astype(np.float32)
+    else:
+        data_scaled = scaler.transform(data).astype(np.float32)
+
+    # Window i covers the days [i, i + look_back), its target is the day i + look_back
+    windows = sliding_window_view(data_scaled, look_back, axis=0).transpose(0, 2, 1)
+    X = windows[:-1]
+    Y = data_scaled[look_back:, target_index]
 
-    X, Y = [], []
-    for i in range(look_back, len(data_scaled)):
-        X.append(data_scaled[i - look_back:i, 0]) # Take the last look_back days as input
-        Y.append(data_scaled[i, 0]) # Target price to predict
+    if materialize:
+        X = np.ascontiguousarray(X)
+    return X, Y, scaler
 
-    return np.array(X), np.array(Y), scaler
+def scaler_from_bounds(data_min, data_max) -> MinMaxScaler:
+    """
+    Rebuild the scaler of a saved model from the bounds of its training data.
+    :param data_min: Minimum of the training data, one value per feature.
+    :param data_max: Maximum of the training data, one value per feature.
+    :return: Fitted MinMaxScaler.
+    """
+    scaler = MinMaxScaler(feature_range=(0, 1))
+    scaler.fit(np.array([data_min, data_max], dtype=np.float64).reshape(2, -1))
+    return scaler
 
 def calculate_mse(actual, predicted):
     """
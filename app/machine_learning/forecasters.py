@@ -0,0 +1,166 @@
+"""
+  Lightweight forecasting baselines, vectorized with NumPy.
+  They fit and predict in microseconds without TensorFlow, so the API process can run them inline,
+  e.g. to answer right away while the LSTM forecast is computed in the background.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class Forecaster:
+    """
+    Interface of the forecasters: fit on the closing prices of a symbol, then predict the next prices.
+    """
+    name = 'forecaster'
+
+    def fit(self, prices: np.ndarray) -> 'Forecaster':
+        """
+        Fit the forecaster on closing prices
+        :param prices: 1-D array of closing prices, oldest first
+        :return: The fitted forecaster
+        """
+        raise NotImplementedError
+
+    def predict(self, period: int) -> np.ndarray:
+        """
+        Predict the prices following the fitted prices
+        :param period: Number of days to predict
+        :return: 1-D array of `period` prices
+        """
+        raise NotImplementedError
+
+    def forecast(self, prices: np.ndarray, period: int) -> np.ndarray:
+        """
+        Fit the forecaster and predict the next prices
+        :param prices: 1-D array of closing prices, oldest first
+        :param period: Number of days to predict
+        :return: 1-D array of `period` prices
+        """
+        return self.fit(prices).predict(period)
+
+    @staticmethod
+    def _validate(prices: np.ndarray, minimum: int = 2) -> np.ndarray:
+        prices = np.asarray(prices, dtype=np.float64).ravel()
+        prices = prices[np.isfinite(prices)]
+        if len(prices) < minimum:
+            raise ValueError(f'At least {minimum} prices are needed, got {len(prices)}...')
+        return prices
+
+
+class EWMAForecaster(Forecaster):
+    """
+    Flat forecast at the exponentially weighted moving average of the prices.
+    """
+    name = 'ewma'
+
+    def __init__(self, alpha: float = 0.1):
+        self.alpha = alpha
+        self.level = None
+
+    def fit(self, prices: np.ndarray) -> 'EWMAForecaster':
+        prices = self._validate(prices, minimum=1)
+        # level_t = alpha * price_t + (1 - alpha) * level_t-1, with level_0 = price_0, as a single dot product
+        decay = (1 - self.alpha) ** np.arange(len(prices) - 1, -1, -1)
+        weights = self.alpha * decay
+        weights[0] = decay[0]
+        self.level = float(weights @ prices)
+        return self
+
+    def predict(self, period: int) -> np.ndarray:
+        return np.full(period, self.level)
+
+
+class DriftForecaster(Forecaster):
+    """
+    Extend the last price along the average daily change over a window.
+    """
+    name = 'drift'
+
+    def __init__(self, window: int = 250):
+        self.window = window
+        self.last = None
+        self.slope = None
+
+    def fit(self, prices: np.ndarray) -> 'DriftForecaster':
+        prices = self._validate(prices)[-self.window:]
+        self.last = prices[-1]
+        self.slope = (prices[-1] - prices[0]) / (len(prices) - 1)
+        return self
+
+    def predict(self, period: int) -> np.ndarray:
+        return self.last + self.slope * np.arange(1, period + 1)
+
+
+class SeasonalNaiveForecaster(Forecaster):
+    """
+    Repeat the last season of prices (a trading week by default).
+    """
+    name = 'seasonal_naive'
+
+    def __init__(self, season: int = 5):
+        self.season = season
+        self.last_season = None
+
+    def fit(self, prices: np.ndarray) -> 'SeasonalNaiveForecaster':
+        self.last_season = self._validate(prices, minimum=self.season)[-self.season:]
+        return self
+
+    def predict(self, period: int) -> np.ndarray:
+        return np.resize(self.last_season, period)
+
+
+class RidgeLagForecaster(Forecaster):
+    """
+    Ridge regression of the next daily log return on the previous `lags` returns, predicted recursively.
+    """
+    name = 'ridge'
+
+    def __init__(self, lags: int = 10, alpha: float = 1.0, window: int = 500):
+        self.lags = lags
+        self.alpha = alpha
+        self.window = window
+        self.coefficients = None
+        self.intercept = 0.0
+        self.last = None
+        self.last_returns = None
+
+    def fit(self, prices: np.ndarray) -> 'RidgeLagForecaster':
+        prices = self._validate(prices, minimum=self.lags + 3)[-(self.window + 1):]
+        returns = np.diff(np.log(prices))
+        X = sliding_window_view(returns[:-1], self.lags)
+        y = returns[self.lags:]
+
+        # Closed-form ridge on centered data, so the intercept is not penalized
+        X_mean, y_mean = X.mean(axis=0), y.mean()
+        X_centered = X - X_mean
+        gram = X_centered.T @ X_centered + self.alpha * np.eye(self.lags)
+        self.coefficients = np.linalg.solve(gram, X_centered.T @ (y - y_mean))
+        self.intercept = y_mean - X_mean @ self.coefficients
+        self.last = prices[-1]
+        self.last_returns = returns[-self.lags:]
+        return self
+
+    def predict(self, period: int) -> np.ndarray:
+        buffer = np.concatenate([self.last_returns, np.empty(period)])
+        for step in range(period):
+            buffer[self.lags + step] = buffer[step:self.lags + step] @ self.coefficients + self.intercept
+        return self.last * np.exp(np.cumsum(buffer[self.lags:]))
+
+
+FORECASTERS = {
+    forecaster.name: forecaster
+    for forecaster in (EWMAForecaster, DriftForecaster, SeasonalNaiveForecaster, RidgeLagForecaster)
+}
+
+
+def get_forecaster(name: str) -> Forecaster:
+    """
+    Get a new baseline forecaster by name
+    :param name: One of FORECASTERS
+    :return: Forecaster
+    :raises ValueError: If the forecaster does not exist
+    """
+    forecaster = FORECASTERS.get(name)
+    if forecaster is None:
+        raise ValueError(f'Unknown forecaster {name}, available: {", ".join(FORECASTERS)}...')
+    return forecaster()
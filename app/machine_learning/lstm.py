@@ -1,24 +1,63 @@
+import dataclasses
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime, timezone
+
 import numpy as np
 import tensorflow as tf
 from keras.src.layers import Dropout
-from tensorflow.keras.models import Sequential
+from tensorflow.keras.callbacks import Callback, EarlyStopping
+from tensorflow.keras.models import Sequential, clone_model
 from tensorflow.keras.layers import LSTM, Dense, Input
 
-def build_lstm_model(input_shape):
+from app.core.config import settings
+from app.machine_learning.data_processing import prepare_lstm_data, scaler_from_bounds
+from app.machine_learning.evaluation import evaluate_predictions
+from app.machine_learning.forecasters import Forecaster
+from app.machine_learning.registry import ModelKey, model_registry
+from app.machine_learning.training import DEFAULT_TRAINING, SHARED_TRAINING, LSTMArchitecture, TrainingConfig
+
+
+def _registered_defaults():
+    """
+    Get the architecture and look-back window written to the registry by the hyperparameter search, if any.
+    The ML worker must be restarted to pick up a new search result.
+    :return: Tuple (LSTMArchitecture, look_back)
+    """
+    config = model_registry.best_config()
+    if config is None:
+        return LSTMArchitecture(), 60
+    architecture = LSTMArchitecture(
+        units=tuple(config['units']), dropout=config['dropout'], dense_units=config['dense_units']
+    )
+    return architecture, config['look_back']
+
+
+DEFAULT_ARCHITECTURE, DEFAULT_LOOK_BACK = _registered_defaults()
+# Registry symbol of the models trained on several symbols
+SHARED_SYMBOL = '_SHARED'
+# Fine-tuning: windows of already seen data trained on with the new bars, and fine-tunes before a full retrain
+FINE_TUNE_CONTEXT_WINDOWS = 250
+FINE_TUNE_VALIDATION_SPLIT = 0.2
+MAX_FINE_TUNES = 20
+
+def build_lstm_model(input_shape, architecture: LSTMArchitecture = DEFAULT_ARCHITECTURE):
     """
     Build and compile a simple LSTM model.
     :param input_shape: Shape of the input data (number of days, features).
+    :param architecture: Hyperparameters of the model.
     :return: Compiled LSTM model.
     """
     print("TensorFlow version:", tf.__version__)
 
     model = Sequential()
     model.add(Input(shape=input_shape))
-    model.add(LSTM(units=60, return_sequences=True))
-    model.add(Dropout(0.3))
-    model.add(LSTM(units=120, return_sequences=False))
-    model.add(Dropout(0.3))
-    model.add(Dense(units=20))
+    for index, units in enumerate(architecture.units):
+        model.add(LSTM(units=units, return_sequences=index < len(architecture.units) - 1))
+        model.add(Dropout(architecture.dropout))
+    model.add(Dense(units=architecture.dense_units))
     model.add(Dense(units=1))
     model.compile(optimizer='adam', loss='mean_squared_error')
 
@@ -27,6 +66,117 @@ def build_lstm_model(input_shape):
 
     return model
 
+class TimeBudget(Callback):
+    """
+    Stop the training at the end of the first epoch that exceeds a wall-clock budget.
+    """
+    def __init__(self, seconds):
+        super().__init__()
+        self.seconds = seconds
+        self.exhausted = False
+        self._start = None
+
+    def on_train_begin(self, logs=None):
+        self._start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        if time.perf_counter() - self._start >= self.seconds:
+            self.exhausted = True
+            self.model.stop_training = True
+
+def fit_model(model, X, Y, training: TrainingConfig, validation_data=None, shuffle=True):
+    """
+    Train a model within the budget of a training configuration, keeping the weights of its best epoch.
+    :param model: Compiled LSTM model.
+    :param X: Training windows.
+    :param Y: Training targets.
+    :param training: Training configuration.
+    :param validation_data: Tuple (X, Y) of validation data, defaults to the last validation_split of the windows.
+    :param shuffle: Shuffle the training windows at every epoch.
+    :return: Dictionary describing the fit (epochs run, best epoch, losses, why it stopped and how long it took).
+    """
+    validation = validation_data is not None or training.validation_split > 0
+    early_stopping = EarlyStopping(
+        monitor='val_loss' if validation else 'loss', patience=training.patience, restore_best_weights=True
+    )
+    callbacks = [early_stopping]
+    time_budget = None
+    if training.time_budget_seconds:
+        time_budget = TimeBudget(training.time_budget_seconds)
+        callbacks.append(time_budget)
+
+    start = time.perf_counter()
+    history = model.fit(
+        X, Y,
+        epochs=training.max_epochs,
+        batch_size=training.batch_size,
+        validation_data=validation_data,
+        validation_split=0.0 if validation_data is not None else training.validation_split,
+        shuffle=shuffle,
+        callbacks=callbacks,
+        verbose=0
+    ).history
+
+    if early_stopping.stopped_epoch > 0:
+        stopped_by = 'early_stopping'
+    elif time_budget is not None and time_budget.exhausted:
+        stopped_by = 'time_budget'
+    else:
+        stopped_by = 'max_epochs'
+    best_epoch = early_stopping.best_epoch
+    return {
+        'epochs': len(history['loss']),
+        'best_epoch': best_epoch + 1,
+        'loss': float(history['loss'][best_epoch]),
+        'val_loss': float(history['val_loss'][best_epoch]) if 'val_loss' in history else None,
+        'stopped_by': stopped_by,
+        'training_seconds': round(time.perf_counter() - start, 3),
+    }
+
+# Compiled forward pass of every model, eager LSTM calls are much slower than model.predict
+def compiled_forward_pass(model):
+    """
+    Get the compiled forward pass of a model, tracing it on first use.
+    It is stored on the model itself, so it is freed with the model when the registry evicts it.
+    :param model: Trained LSTM model.
+    :return: tf.function taking a batch of sequences and returning the predictions.
+    """
+    forward_pass = getattr(model, '_compiled_forward_pass', None)
+    if forward_pass is None:
+        features = model.input_shape[-1]
+        forward_pass = tf.function(
+            lambda sequences: model(sequences, training=False),
+            input_signature=[tf.TensorSpec(shape=(None, None, features), dtype=tf.float32)]
+        )
+        model._compiled_forward_pass = forward_pass
+    return forward_pass
+
+def rollout(model, sequences, period):
+    """
+    Recursively predict the next scaled values of many sequences at once with a single model:
+    each step is one batched forward pass, whose output is written into a preallocated buffer
+    that the next step reads its input window from.
+    :param model: Trained LSTM model.
+    :param sequences: Last known sequences (normalized), of shape (batch, look_back, 1).
+    :param period: Number of days to predict.
+    :return: Array of shape (batch, period) with the predicted values (normalized).
+    :raises ValueError: If the sequences have more than one feature, the model only predicts the next price.
+    """
+    sequences = np.asarray(sequences, dtype=np.float32)
+    batch, look_back, features = sequences.shape
+    if features != 1:
+        raise ValueError(f'Cannot roll out sequences of {features} features, the model only predicts the price...')
+    buffer = np.empty((batch, look_back + period, features), dtype=np.float32)
+    buffer[:, :look_back] = sequences
+
+    # Compiled call instead of model.predict, which has a large per-call overhead
+    forward_pass = compiled_forward_pass(model)
+    for step in range(period):
+        prediction = forward_pass(buffer[:, step:step + look_back])
+        buffer[:, look_back + step, 0] = prediction.numpy()[:, 0]
+
+    return buffer[:, look_back:, 0]
+
 def predict_future_prices(model, last_sequence, scaler, period):
     """
     Predict future prices using a trained LSTM model.
@@ -36,16 +186,357 @@ def predict_future_prices(model, last_sequence, scaler, period):
     :param period: Number of days to predict.
     :return: List of predicted prices (denormalized).
     """
-    predictions = []
-    current_sequence = last_sequence.copy()
+    predictions = rollout(model, np.asarray(last_sequence).reshape(1, -1, 1), period)
+    return [float(price) for price in scaler.inverse_transform(predictions.reshape(-1, 1))[:, 0]]
+
+class LSTMForecaster(Forecaster):
+    """
+    LSTM model behind the forecaster interface, trained from scratch without the registry (e.g. for backtests).
+    """
+    name = 'lstm'
+
+    def __init__(
+        self,
+        training: TrainingConfig = DEFAULT_TRAINING,
+        look_back=DEFAULT_LOOK_BACK,
+        architecture: LSTMArchitecture = DEFAULT_ARCHITECTURE
+    ):
+        self.training = training
+        self.look_back = look_back
+        self.architecture = architecture
+        self.model = None
+        self.scaler = None
+        self.last_sequence = None
+        self.fit_summary = None
+
+    def fit(self, prices):
+        X, Y, self.scaler = prepare_lstm_data(prices, self.look_back)
+        self.model = build_lstm_model(X.shape[1:], self.architecture)
+        self.fit_summary = fit_model(self.model, X, Y, self.training)
+        self.last_sequence = self.scaler.transform(np.asarray(prices[-self.look_back:]).reshape(-1, 1))
+        return self
+
+    def predict(self, period):
+        return np.array(predict_future_prices(self.model, self.last_sequence, self.scaler, period))
+
+def get_fresh_model(symbol, data_cutoff, look_back=DEFAULT_LOOK_BACK, architecture=DEFAULT_ARCHITECTURE):
+    """
+    Get the latest model of a symbol from the registry if it is fresh enough for the data cutoff.
+    :param symbol: Stock symbol.
+    :param data_cutoff: Date of the last closing price (format: YYYY-MM-DD).
+    :param look_back: Number of historical days to consider for each prediction.
+    :param architecture: Hyperparameters of the model.
+    :return: Tuple (model, metadata) or None if the model must be trained.
+    """
+    latest = model_registry.latest(symbol.upper(), look_back, architecture.name)
+    if latest is None or model_registry.is_stale(latest, data_cutoff):
+        return None
+    return model_registry.get(latest)
+
+def stack_training_data(series, look_back=DEFAULT_LOOK_BACK, validation_split=0.0):
+    """
+    Build the training windows of many symbols, each scaled with its own bounds, and stack them for a single fit.
+    The validation windows are the last ones of every symbol, like validation_split does for a single symbol.
+    :param series: Dictionary mapping each symbol to its closing prices.
+    :param look_back: Number of historical days to consider for each prediction.
+    :param validation_split: Fraction of the windows of each symbol kept for validation.
+    :return: Tuple (X, Y, validation data as a (X, Y) tuple or None, dictionary of the scaler of each symbol).
+    """
+    train_x, train_y, validation_x, validation_y, scalers = [], [], [], [], {}
+    for symbol, close_prices in series.items():
+        X, Y, scaler = prepare_lstm_data(close_prices, look_back)
+        split = len(X) - int(len(X) * validation_split)
+        train_x.append(X[:split])
+        train_y.append(Y[:split])
+        validation_x.append(X[split:])
+        validation_y.append(Y[split:])
+        scalers[symbol] = scaler
+    if not scalers:
+        raise ValueError('No prices to train on...')
+
+    validation_data = (np.concatenate(validation_x), np.concatenate(validation_y)) if validation_split else None
+    return np.concatenate(train_x), np.concatenate(train_y), validation_data, scalers
+
+def train_shared_model(
+    series,
+    training: TrainingConfig = SHARED_TRAINING,
+    look_back=DEFAULT_LOOK_BACK,
+    architecture: LSTMArchitecture = DEFAULT_ARCHITECTURE
+):
+    """
+    Train a single model on the stacked windows of many symbols in one fit with large batches,
+    then register it for every symbol with the scaler bounds of the symbol.
+    This is an operation of the ML worker, so it only takes and returns picklable values.
+    :param series: Dictionary mapping each symbol to a tuple (closing prices, date of the last closing price).
+    :param training: Training configuration, its validation_split applies to the windows of each symbol.
+    :param look_back: Number of historical days to consider for each prediction.
+    :param architecture: Hyperparameters of the model.
+    :return: Dictionary mapping each symbol to the metadata of its model, or to {"error": message}.
+    """
+    results = {}
+    prices = {}
+    for symbol, (close_prices, _) in series.items():
+        if len(close_prices) <= look_back:
+            results[symbol] = {'error': f'At least {look_back + 1} prices are needed, got {len(close_prices)}...'}
+        else:
+            prices[symbol] = close_prices
+    if not prices:
+        return results
+
+    X, Y, validation_data, scalers = stack_training_data(prices, look_back, training.validation_split)
+    model = build_lstm_model(X.shape[1:], architecture)
+    fit = fit_model(model, X, Y, training, validation_data=validation_data)
+
+    trained_at = datetime.now(timezone.utc).isoformat()
+    shared_cutoff = max(series[symbol][1] for symbol in prices)
+    # Each fit has its own key, the fits of other symbol sets on the same day must not overwrite it
+    fit_id = hashlib.sha1(json.dumps([sorted(prices), trained_at]).encode()).hexdigest()[:12]
+    shared_key = ModelKey(SHARED_SYMBOL, look_back, architecture.name, f'{shared_cutoff}.{fit_id}')
+    # The previous shared models are pruned once the symbols reference the new one
+    model_registry.save(shared_key, model, {
+        'symbols': sorted(prices),
+        **fit,
+        'trained_at': trained_at,
+    }, prune=False)
+    for symbol, scaler in scalers.items():
+        key = ModelKey(symbol.upper(), look_back, architecture.name, series[symbol][1])
+        metadata = {
+            'data_min': float(scaler.data_min_[0]),
+            'data_max': float(scaler.data_max_[0]),
+            'prices': len(series[symbol][0]),
+            **fit,
+            'trained_at': trained_at,
+        }
+        model_registry.save_reference(key, shared_key, model, metadata)
+        results[symbol] = model_registry.metadata(key)
+    model_registry.prune_shared(SHARED_SYMBOL, look_back, architecture.name)
+    return results
+
+def get_or_train_model(
+    symbol,
+    close_prices,
+    data_cutoff,
+    training: TrainingConfig = DEFAULT_TRAINING,
+    look_back=DEFAULT_LOOK_BACK,
+    architecture: LSTMArchitecture = DEFAULT_ARCHITECTURE
+):
+    """
+    Get the latest model of a symbol from the registry, training and saving a new one when none is fresh enough.
+    :param symbol: Stock symbol.
+    :param close_prices: Array of closing prices.
+    :param data_cutoff: Date of the last closing price (format: YYYY-MM-DD).
+    :param training: Training configuration.
+    :param look_back: Number of historical days to consider for each prediction.
+    :param architecture: Hyperparameters of the model.
+    :return: Tuple of the trained model and the scaler of its training data.
+    """
+    symbol = symbol.upper()
+    latest = model_registry.latest(symbol, look_back, architecture.name)
+    if latest and not model_registry.is_stale(latest, data_cutoff):
+        entry = model_registry.get(latest)
+        if entry is not None:
+            model, metadata = entry
+            return model, scaler_from_bounds(metadata['data_min'], metadata['data_max'])
+
+    if latest and settings.MODEL_FINE_TUNE_ENABLED:
+        fine_tuned = fine_tune_model(latest, close_prices, data_cutoff, training)
+        if fine_tuned is not None:
+            return fine_tuned
+
+    # Prepare the data for LSTM
+    X, Y, scaler = prepare_lstm_data(close_prices, look_back)
 
-    for _ in range(period):
-        # Reshape current sequence for prediction
-        prediction = model.predict(current_sequence.reshape(1, -1, 1))
-        denormalized_prediction = scaler.inverse_transform(prediction.reshape(-1, 1))[0, 0]
-        predictions.append(float(denormalized_prediction))  # Convert to native float
+    # Build and train the LSTM model
+    model = build_lstm_model(X.shape[1:], architecture)
+    fit = fit_model(model, X, Y, training)
 
-        # Update the sequence with the new prediction
-        current_sequence = np.append(current_sequence[1:], prediction)
+    # Another worker may have saved this key first, its model is the one registered
+    model, metadata = model_registry.save(ModelKey(symbol, look_back, architecture.name, data_cutoff), model, {
+        'data_min': float(scaler.data_min_[0]),
+        'data_max': float(scaler.data_max_[0]),
+        'prices': len(close_prices),
+        **fit,
+        'trained_at': datetime.now(timezone.utc).isoformat(),
+    })
+    return model, scaler_from_bounds(metadata['data_min'], metadata['data_max'])
+
+def evaluate_model(model, X, Y, scaler):
+    """
+    Evaluate the next-day predictions of a model on windows, in prices.
+    :param model: Trained LSTM model.
+    :param X: Normalized windows of shape (samples, look_back, 1).
+    :param Y: Normalized next-day prices of shape (samples,).
+    :param scaler: Scaler used for normalization and inverse transformation.
+    :return: Dictionary with RMSE, MAE, and R² scores.
+    """
+    predictions = compiled_forward_pass(model)(X).numpy()
+    return evaluate_predictions(
+        scaler.inverse_transform(np.asarray(Y).reshape(-1, 1))[:, 0],
+        scaler.inverse_transform(predictions.reshape(-1, 1))[:, 0]
+    )
 
+def fine_tune_model(key: ModelKey, close_prices, data_cutoff, training: TrainingConfig = DEFAULT_TRAINING):
+    """
+    Warm-start a stale model: train a copy of it for a few epochs on the bars it has not seen, with some context,
+    and keep it only if its error on held-out context windows did not degrade.
+    :param key: ModelKey of the stale model.
+    :param close_prices: Array of closing prices, including the new bars.
+    :param data_cutoff: Date of the last closing price (format: YYYY-MM-DD).
+    :param training: Training configuration, its epochs are capped to MODEL_FINE_TUNE_EPOCHS.
+    :return: Tuple of the fine-tuned model and its scaler, or None if the model must be trained from scratch.
+    """
+    entry = model_registry.get(key)
+    if entry is None:
+        return None
+    model, metadata = entry
+    if metadata.get('shared_model') or 'prices' not in metadata or metadata.get('fine_tunes', 0) >= MAX_FINE_TUNES:
+        return None
+    new_prices = len(close_prices) - metadata['prices']
+    if not 0 < new_prices <= settings.MODEL_FINE_TUNE_MAX_NEW_BARS:
+        return None
+
+    # Keep the scaler of the model, so the fine-tuned weights still match its normalization
+    scaler = scaler_from_bounds(metadata['data_min'], metadata['data_max'])
+    recent_prices = close_prices[-(key.look_back + new_prices + FINE_TUNE_CONTEXT_WINDOWS):]
+    X, Y, _ = prepare_lstm_data(recent_prices, key.look_back, scaler=scaler)
+    # The windows ending on the new bars are the last ones and are always trained on.
+    # Every n-th window of the older context is held out, so both models are compared on the same recent slice
+    context = len(X) - new_prices
+    step = max(2, round(1 / FINE_TUNE_VALIDATION_SPLIT))
+    validation = np.zeros(len(X), dtype=bool)
+    validation[step - 1:context:step] = True
+    if not validation.any():
+        return None
+    X_train, Y_train, X_val, Y_val = X[~validation], Y[~validation], X[validation], Y[validation]
+    baseline = evaluate_model(model, X_val, Y_val, scaler)
+
+    # Train a copy, the model in memory may be used by other predictions
+    fine_tuned = clone_model(model)
+    fine_tuned.set_weights(model.get_weights())
+    fine_tuned.compile(optimizer='adam', loss='mean_squared_error')
+    fine_tuning = dataclasses.replace(
+        training,
+        max_epochs=min(training.max_epochs, settings.MODEL_FINE_TUNE_EPOCHS),
+        patience=min(training.patience, 2)
+    )
+    fit = fit_model(fine_tuned, X_train, Y_train, fine_tuning, validation_data=(X_val, Y_val))
+    score = evaluate_model(fine_tuned, X_val, Y_val, scaler)
+    if score['RMSE'] > baseline['RMSE'] * (1 + settings.MODEL_FINE_TUNE_TOLERANCE):
+        logging.info(f'Fine-tuning {key.symbol} degraded the RMSE from {baseline["RMSE"]:.4f} to '
+                     f'{score["RMSE"]:.4f}, training it from scratch')
+        return None
+
+    fine_tuned_key = ModelKey(key.symbol, key.look_back, key.architecture, data_cutoff)
+    fine_tuned, metadata = model_registry.save(fine_tuned_key, fine_tuned, {
+        'data_min': metadata['data_min'],
+        'data_max': metadata['data_max'],
+        'prices': len(close_prices),
+        **fit,
+        'rmse': float(score['RMSE']),
+        'fine_tuned_from': key.data_cutoff,
+        'fine_tunes': metadata.get('fine_tunes', 0) + 1,
+        'trained_at': datetime.now(timezone.utc).isoformat(),
+    })
+    return fine_tuned, scaler_from_bounds(metadata['data_min'], metadata['data_max'])
+
+def train_model(
+    symbol,
+    close_prices,
+    data_cutoff,
+    training: TrainingConfig = DEFAULT_TRAINING,
+    look_back=DEFAULT_LOOK_BACK
+):
+    """
+    Make sure the registry has a fresh model for a symbol, training it if needed.
+    :param symbol: Stock symbol.
+    :param close_prices: Array of closing prices.
+    :param data_cutoff: Date of the last closing price (format: YYYY-MM-DD).
+    :param training: Training configuration of the stale models.
+    :param look_back: Number of historical days to consider for each prediction.
+    :return: Metadata of the registered model.
+    """
+    get_or_train_model(symbol, close_prices, data_cutoff, training, look_back)
+    key = model_registry.latest(symbol.upper(), look_back, DEFAULT_ARCHITECTURE.name)
+    return model_registry.metadata(key)
+
+def forecast_many(
+    series,
+    period,
+    training: TrainingConfig = DEFAULT_TRAINING,
+    look_back=DEFAULT_LOOK_BACK
+):
+    """
+    Predict the next prices of many symbols, running one batched rollout for all the symbols sharing a model.
+    This is an operation of the ML worker, so it only takes and returns picklable values.
+    :param series: Dictionary mapping each symbol to a tuple (closing prices, date of the last closing price).
+    :param period: Number of days to predict.
+    :param training: Training configuration of the stale models.
+    :param look_back: Number of historical days to consider for each prediction.
+    :return: Dictionary mapping each symbol to its list of predicted prices, or to {"error": message}.
+    """
+    results = {}
+    groups = {}
+    if settings.MODEL_TRAINING_MODE == 'shared':
+        # Train every stale symbol together, the loop below then finds their models in the registry
+        stale = {
+            symbol: (close_prices, data_cutoff) for symbol, (close_prices, data_cutoff) in series.items()
+            if get_fresh_model(symbol, data_cutoff, look_back) is None
+        }
+        if len(stale) > 1:
+            try:
+                shared_training = dataclasses.replace(training, batch_size=settings.MODEL_SHARED_BATCH_SIZE)
+                results.update({
+                    symbol: result
+                    for symbol, result in train_shared_model(stale, shared_training, look_back).items()
+                    if 'error' in result
+                })
+            except Exception as e:
+                logging.error(f'Error training the shared model, training every symbol on its own: {e}')
+
+    for symbol, (close_prices, data_cutoff) in series.items():
+        if symbol in results:
+            continue
+        try:
+            model, scaler = get_or_train_model(symbol, close_prices, data_cutoff, training, look_back)
+            last_prices = np.asarray(close_prices[-look_back:], dtype=np.float64).reshape(-1, 1)
+            groups.setdefault(id(model), (model, []))[1].append((symbol, scaler.transform(last_prices), scaler))
+        except Exception as e:
+            results[symbol] = {'error': str(e)}
+
+    for model, members in groups.values():
+        predictions = rollout(model, np.stack([sequence for _, sequence, _ in members]), period)
+
+        # Denormalize every row with the bounds of its own symbol
+        data_min = np.array([scaler.data_min_[0] for _, _, scaler in members])
+        data_range = np.array([scaler.data_range_[0] for _, _, scaler in members])
+        prices = predictions * data_range[:, None] + data_min[:, None]
+        for (symbol, _, _), symbol_prices in zip(members, prices):
+            results[symbol] = [float(price) for price in symbol_prices]
+
+    return results
+
+def forecast_prices(
+    symbol,
+    close_prices,
+    data_cutoff,
+    period,
+    training: TrainingConfig = DEFAULT_TRAINING,
+    look_back=DEFAULT_LOOK_BACK
+):
+    """
+    Predict the next prices of a symbol with its registered LSTM model, training it only when it is stale.
+    This is an operation of the ML worker, so it only takes and returns picklable values.
+    :param symbol: Stock symbol.
+    :param close_prices: Array of closing prices.
+    :param data_cutoff: Date of the last closing price (format: YYYY-MM-DD).
+    :param period: Number of days to predict.
+    :param training: Training configuration of the stale models.
+    :param look_back: Number of historical days to consider for each prediction.
+    :return: List of predicted prices (denormalized).
+    """
+    predictions = forecast_many(
+        {symbol: (close_prices, data_cutoff)}, period, training, look_back
+    )[symbol]
+    if isinstance(predictions, dict):
+        raise ValueError(predictions['error'])
     return predictions
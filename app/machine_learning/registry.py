@@ -0,0 +1,305 @@
+import json
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Optional
+
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class ModelKey:
+    """
+    Identify a trained model by symbol, look-back window, architecture and the date of the last bar it was trained on.
+    """
+    symbol: str
+    look_back: int
+    architecture: str
+    data_cutoff: str
+
+
+class ModelRegistry:
+    """
+    Registry of trained models, saved on disk and lazily loaded into a bounded in-memory LRU.
+    Layout: <root>/<SYMBOL>/<look_back>-<architecture>/<data_cutoff>/{model.keras,metadata.json}
+    A model trained on several symbols is saved once, the entry of each symbol then only has a metadata.json
+    referencing it under `shared_model`. Every shared fit has its own `<data_cutoff>.<fit ID>` directory,
+    and it is deleted once no symbol references it anymore.
+    """
+    MODEL_FILE = 'model.keras'
+    METADATA_FILE = 'metadata.json'
+    BEST_CONFIG_FILE = 'best_config.json'
+
+    def __init__(self, root: str, max_in_memory: int = 16, max_age_days: int = 1, keep: int = 2):
+        self.root = root
+        self.max_in_memory = max_in_memory
+        self.max_age_days = max_age_days
+        self.keep = keep
+        self._models: OrderedDict[ModelKey, tuple[Any, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    def _family_path(self, symbol: str, look_back: int, architecture: str) -> str:
+        return os.path.join(self.root, symbol.upper(), f'{look_back}-{architecture}')
+
+    def _cutoffs(self, family_path: str) -> list[str]:
+        # Only the saved models: the temporary directories of the saves in progress (or interrupted) are skipped
+        cutoffs = []
+        for entry in os.listdir(family_path):
+            if entry.endswith('.tmp'):
+                continue
+            try:
+                # The directories of the shared fits are suffixed with the ID of the fit
+                date.fromisoformat(entry.split('.')[0])
+            except ValueError:
+                continue
+            if os.path.isfile(os.path.join(family_path, entry, self.METADATA_FILE)):
+                cutoffs.append(entry)
+        return cutoffs
+
+    def path(self, key: ModelKey) -> str:
+        """
+        Get the directory of a model
+        :param key: ModelKey
+        :return: str
+        """
+        return os.path.join(self._family_path(key.symbol, key.look_back, key.architecture), key.data_cutoff)
+
+    def latest(self, symbol: str, look_back: int, architecture: str) -> Optional[ModelKey]:
+        """
+        Find the most recently trained model of a symbol for a look-back window and an architecture.
+        :param symbol: str
+        :param look_back: int
+        :param architecture: str
+        :return: ModelKey or None if no model was saved
+        """
+        family_path = self._family_path(symbol, look_back, architecture)
+        try:
+            cutoffs = self._cutoffs(family_path)
+        except FileNotFoundError:
+            return None
+        if not cutoffs:
+            return None
+        return ModelKey(symbol.upper(), look_back, architecture, max(cutoffs))
+
+    def version(self, symbol: str) -> Optional[str]:
+        """
+        Get the version of the models of a symbol, i.e. the most recent data cutoff among every family
+        :param symbol: str
+        :return: str or None if no model was saved
+        """
+        symbol_path = os.path.join(self.root, symbol.upper())
+        try:
+            families = os.listdir(symbol_path)
+        except FileNotFoundError:
+            return None
+
+        cutoffs = [
+            cutoff
+            for family in families if os.path.isdir(os.path.join(symbol_path, family))
+            for cutoff in self._cutoffs(os.path.join(symbol_path, family))
+        ]
+        return max(cutoffs, default=None)
+
+    def is_stale(self, key: ModelKey, data_cutoff: str) -> bool:
+        """
+        Check if a model is too old for the data available now
+        :param key: ModelKey
+        :param data_cutoff: Date of the last available bar (format: YYYY-MM-DD).
+        :return: bool
+        """
+        age = date.fromisoformat(data_cutoff) - date.fromisoformat(key.data_cutoff)
+        return age.days >= self.max_age_days
+
+    def metadata(self, key: ModelKey) -> Optional[dict]:
+        """
+        Read the metadata of a model without loading it
+        :param key: ModelKey
+        :return: dict or None if the model does not exist
+        """
+        try:
+            with open(os.path.join(self.path(key), self.METADATA_FILE)) as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def get(self, key: ModelKey) -> Optional[tuple[Any, dict]]:
+        """
+        Get a model and its metadata, from memory or from disk.
+        :param key: ModelKey
+        :return: Tuple (model, metadata) or None if the model does not exist
+        """
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        metadata = self.metadata(key)
+        if metadata is None:
+            return None
+
+        if metadata.get('shared_model'):
+            shared = self.get(ModelKey(**metadata['shared_model']))
+            if shared is None:
+                # The shared model was pruned
+                return None
+            model = shared[0]
+        else:
+            from tensorflow import keras
+            model = keras.models.load_model(os.path.join(self.path(key), self.MODEL_FILE))
+            self.loads += 1
+        self._remember(key, model, metadata)
+        return model, metadata
+
+    def save(self, key: ModelKey, model: Any, metadata: dict, prune: bool = True) -> tuple[Any, dict]:
+        """
+        Save a trained model and its metadata, then keep it in memory.
+        If another worker saved the same key first, its model is kept and returned instead.
+        :param key: ModelKey
+        :param model: Trained Keras model
+        :param metadata: JSON serializable dict (scaler bounds, training details...)
+        :param prune: Delete the oldest models of the family, see prune
+        :return: Tuple (model, metadata) registered under the key
+        """
+        metadata = {**metadata, 'symbol': key.symbol, 'look_back': key.look_back,
+                    'architecture': key.architecture, 'data_cutoff': key.data_cutoff}
+        path = self.path(key)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        os.makedirs(tmp_path, exist_ok=True)
+        if not metadata.get('shared_model'):
+            model.save(os.path.join(tmp_path, self.MODEL_FILE))
+        with open(os.path.join(tmp_path, self.METADATA_FILE), 'w') as file:
+            json.dump(metadata, file)
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            # Another worker saved the same model first: use it, so the memory and the disk do not disagree
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            with self._lock:
+                self._models.pop(key, None)
+            entry = self.get(key)
+            if entry is not None:
+                return entry
+
+        self._remember(key, model, metadata)
+        if prune:
+            self.prune(key.symbol, key.look_back, key.architecture)
+        return model, metadata
+
+    def save_reference(self, key: ModelKey, shared_key: ModelKey, model: Any, metadata: dict) -> tuple[Any, dict]:
+        """
+        Register a model trained on several symbols for one of them, without saving it again.
+        :param key: ModelKey of the symbol
+        :param shared_key: ModelKey the shared model was saved with
+        :param model: Trained Keras model
+        :param metadata: JSON serializable dict of the symbol (scaler bounds, training details...)
+        :return: Tuple (model, metadata) registered under the key, see save
+        """
+        shared_model = {'symbol': shared_key.symbol, 'look_back': shared_key.look_back,
+                        'architecture': shared_key.architecture, 'data_cutoff': shared_key.data_cutoff}
+        return self.save(key, model, {**metadata, 'shared_model': shared_model})
+
+    def prune(self, symbol: str, look_back: int, architecture: str) -> None:
+        """
+        Delete the oldest models of a family, keeping the `keep` most recent ones
+        :param symbol: str
+        :param look_back: int
+        :param architecture: str
+        """
+        family_path = self._family_path(symbol, look_back, architecture)
+        cutoffs = sorted(self._cutoffs(family_path))
+        for cutoff in cutoffs[:-self.keep]:
+            shutil.rmtree(os.path.join(family_path, cutoff), ignore_errors=True)
+            with self._lock:
+                self._models.pop(ModelKey(symbol.upper(), look_back, architecture, cutoff), None)
+
+    def prune_shared(self, symbol: str, look_back: int, architecture: str, grace_seconds: float = 3600) -> None:
+        """
+        Delete the models of a shared family that no symbol references anymore
+        :param symbol: Registry symbol of the shared models
+        :param look_back: int
+        :param architecture: str
+        :param grace_seconds: Keep the models saved more recently, their references may still be being saved
+        """
+        family_path = self._family_path(symbol, look_back, architecture)
+        referenced = set()
+        for directory, _, files in os.walk(self.root):
+            if self.METADATA_FILE not in files or directory.endswith('.tmp'):
+                continue
+            try:
+                with open(os.path.join(directory, self.METADATA_FILE)) as file:
+                    shared_model = json.load(file).get('shared_model')
+            except (OSError, ValueError):
+                continue
+            if shared_model:
+                referenced.add(self.path(ModelKey(**shared_model)))
+
+        for cutoff in self._cutoffs(family_path):
+            key = ModelKey(symbol.upper(), look_back, architecture, cutoff)
+            try:
+                recent = time.time() - os.path.getmtime(self.path(key)) < grace_seconds
+            except OSError:
+                continue
+            if not recent and self.path(key) not in referenced:
+                shutil.rmtree(self.path(key), ignore_errors=True)
+                with self._lock:
+                    self._models.pop(key, None)
+
+    def best_config(self) -> Optional[dict]:
+        """
+        Read the model configuration selected by the hyperparameter search
+        :return: dict (units, dropout, dense_units, look_back...) or None if no search was run
+        """
+        try:
+            with open(os.path.join(self.root, self.BEST_CONFIG_FILE)) as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def save_best_config(self, config: dict) -> None:
+        """
+        Save the model configuration selected by the hyperparameter search, the next models are trained with it
+        :param config: JSON serializable dict (units, dropout, dense_units, look_back...)
+        """
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, self.BEST_CONFIG_FILE)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump(config, file, indent=2)
+        os.replace(tmp_path, path)
+
+    def _remember(self, key: ModelKey, model: Any, metadata: dict) -> None:
+        with self._lock:
+            self._models[key] = (model, metadata)
+            self._models.move_to_end(key)
+            while len(self._models) > self.max_in_memory:
+                self._models.popitem(last=False)
+
+    def stats(self) -> dict:
+        """
+        Get the registry counters
+        :return: dict
+        """
+        with self._lock:
+            return {
+                'in_memory': len(self._models),
+                'max_in_memory': self.max_in_memory,
+                'hits': self.hits,
+                'loads': self.loads,
+            }
+
+
+# One registry per process, the models in memory are reused by every training or prediction call of the process
+model_registry = ModelRegistry(
+    root=settings.MODEL_REGISTRY_DIR,
+    max_in_memory=settings.MODEL_CACHE_SIZE,
+    max_age_days=settings.MODEL_MAX_AGE_DAYS,
+    keep=settings.MODEL_REGISTRY_KEEP
+)
@@ -0,0 +1,162 @@
+"""
+  Hyperparameter search of the LSTM architecture.
+  Every candidate configuration is scored with the walk-forward backtest on several symbols, the (candidate, symbol)
+  pairs running in parallel in spawned processes on the CPU. Each candidate is scored on its accuracy and on its cost
+  (fit time, parameter count, prediction latency); the most accurate of the cheapest configurations on the Pareto
+  front is written to the model registry, and the next models are trained with it.
+"""
+import itertools
+import os
+import random
+import time
+from concurrent.futures import as_completed
+from dataclasses import asdict
+from typing import Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.machine_learning.backtest import BacktestConfig, backtest_symbol, process_pool
+from app.machine_learning.registry import model_registry
+from app.machine_learning.training import LSTMArchitecture
+from app.repository.price_history import PriceHistoryRepository
+
+SEARCH_SPACE = {
+    'units': [(32,), (64,), (32, 64), (60, 120)],
+    'dropout': [0.1, 0.3],
+    'dense_units': [10, 20],
+    'look_back': [20, 40, 60],
+}
+# Lower is better for every objective
+OBJECTIVES = ('RMSE', 'fit_seconds', 'parameters', 'predict_ms')
+
+
+def candidates(space: dict = SEARCH_SPACE, samples: Optional[int] = None, seed: int = 0) -> list[dict]:
+    """
+    List the configurations to evaluate: the full grid, or a random sample of it
+    :param space: dict mapping each hyperparameter to its values
+    :param samples: Number of configurations to sample, defaults to the full grid
+    :param seed: Random seed of the sample
+    :return: list of dict
+    """
+    grid = [dict(zip(space, values)) for values in itertools.product(*space.values())]
+    if samples is not None and samples < len(grid):
+        grid = random.Random(seed).sample(grid, samples)
+    return grid
+
+
+def score(candidate: dict, results: list[dict]) -> dict:
+    """
+    Average the backtests of a candidate over the symbols
+    :param candidate: Configuration
+    :param results: Results of backtest_symbol for this candidate
+    :return: dict with the configuration, its accuracy and its cost
+    """
+    architecture = LSTMArchitecture(
+        units=tuple(candidate['units']), dropout=candidate['dropout'], dense_units=candidate['dense_units']
+    )
+    succeeded = [result for result in results if 'error' not in result]
+    scored = {
+        **candidate,
+        'architecture': architecture.name,
+        'parameters': architecture.parameter_count(),
+        'symbols': len(succeeded),
+        'failed': [result['symbol'] for result in results if 'error' in result],
+    }
+    if succeeded:
+        for metric in ('RMSE', 'MAE', 'R2', 'predict_ms'):
+            scored[metric] = float(np.mean([result[metric] for result in succeeded]))
+        scored['fit_seconds'] = float(np.mean([result['fit_seconds'] for result in succeeded]))
+    return scored
+
+
+def pareto_front(scores: list[dict], objectives: tuple = OBJECTIVES) -> list[dict]:
+    """
+    Keep the candidates no other candidate beats on every objective
+    :param scores: Results of score
+    :param objectives: Metrics to minimize
+    :return: list of dict, most accurate first
+    """
+    def dominates(a, b):
+        return (all(a[name] <= b[name] for name in objectives)
+                and any(a[name] < b[name] for name in objectives))
+
+    front = [
+        candidate for candidate in scores
+        if not any(dominates(other, candidate) for other in scores if other is not candidate)
+    ]
+    return sorted(front, key=lambda candidate: candidate['RMSE'])
+
+
+def select(front: list[dict], tolerance: float = 0.02) -> dict:
+    """
+    Pick the smallest configuration of the Pareto front within a tolerance of the best accuracy
+    :param front: Result of pareto_front
+    :param tolerance: Relative RMSE loss accepted for a cheaper configuration
+    :return: dict
+    """
+    best_rmse = min(candidate['RMSE'] for candidate in front)
+    accurate = [candidate for candidate in front if candidate['RMSE'] <= best_rmse * (1 + tolerance)]
+    return min(accurate, key=lambda candidate: (candidate['parameters'], candidate['fit_seconds'], candidate['RMSE']))
+
+
+def run_search(
+    configurations: list[dict],
+    symbols: Optional[list[str]] = None,
+    config: BacktestConfig = BacktestConfig(folds=3),
+    root: str = settings.PRICE_HISTORY_DIR,
+    workers: Optional[int] = None,
+    tolerance: float = 0.02,
+    register: bool = True
+) -> dict:
+    """
+    Backtest every configuration on every symbol in parallel across processes, and register the selected one.
+    :param configurations: Result of candidates
+    :param symbols: Symbols to backtest on, defaults to every stored symbol
+    :param config: BacktestConfig, the same walk-forward schedule for every configuration
+    :param root: Directory of the price history store
+    :param workers: Number of processes, defaults to the number of CPUs
+    :param tolerance: See select
+    :param register: Write the selected configuration to the model registry
+    :return: dict with the score of every configuration, the Pareto front and the selected configuration
+    :raises ValueError: If no configuration could be backtested
+    """
+    symbols = symbols or PriceHistoryRepository(root).symbols()
+    workers = workers or os.cpu_count()
+
+    start = time.perf_counter()
+    results = {index: [] for index in range(len(configurations))}
+    with process_pool(workers) as pool:
+        futures = {
+            pool.submit(backtest_symbol, root, symbol, 'lstm', config, candidate): index
+            for index, candidate in enumerate(configurations) for symbol in symbols
+        }
+        for future in as_completed(futures):
+            results[futures[future]].append(future.result())
+
+    scores = [score(candidate, results[index]) for index, candidate in enumerate(configurations)]
+    scored = [candidate for candidate in scores if 'RMSE' in candidate]
+    if not scored:
+        raise ValueError('No configuration could be backtested, check the symbols and the price history...')
+
+    front = pareto_front(scored)
+    selected = select(front, tolerance)
+    if register:
+        model_registry.save_best_config({
+            'units': list(selected['units']),
+            'dropout': selected['dropout'],
+            'dense_units': selected['dense_units'],
+            'look_back': selected['look_back'],
+            'RMSE': selected['RMSE'],
+            'parameters': selected['parameters'],
+            'backtest': asdict(config),
+            'symbols': symbols,
+        })
+    return {
+        'config': asdict(config),
+        'seconds': time.perf_counter() - start,
+        'registered': register,
+        'selected': selected,
+        'pareto_front': front,
+        'scores': sorted(scores, key=lambda candidate: candidate.get('RMSE', float('inf'))),
+    }
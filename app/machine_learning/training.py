@@ -0,0 +1,59 @@
+from dataclasses import dataclass, replace
+from typing import Optional
+
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class LSTMArchitecture:
+    """
+    Hyperparameters of the stacked LSTM model.
+    """
+    units: tuple[int, ...] = (60, 120)
+    dropout: float = 0.3
+    dense_units: int = 20
+
+    @property
+    def name(self) -> str:
+        units = 'x'.join(str(unit) for unit in self.units)
+        return f'lstm{units}-d{self.dropout}-dense{self.dense_units}'
+
+    def parameter_count(self, features: int = 1) -> int:
+        """
+        Count the trainable parameters of the model without building it
+        :param features: Number of input features
+        :return: int
+        """
+        count = 0
+        inputs = features
+        for units in self.units:
+            # Input, recurrent and bias weights of the 4 gates
+            count += 4 * (units * (inputs + units) + units)
+            inputs = units
+        return count + inputs * self.dense_units + self.dense_units + self.dense_units + 1
+
+
+@dataclass(frozen=True)
+class TrainingConfig:
+    """
+    Budget of a model fit: it stops at max_epochs, when the validation loss did not improve for `patience` epochs,
+    or when the time budget is spent, whichever comes first, and keeps the weights of the best epoch.
+    It has no TensorFlow dependency, so the API process can pass it to the ML worker.
+    """
+    max_epochs: int = 80
+    patience: int = 5
+    time_budget_seconds: Optional[float] = None
+    batch_size: int = 16
+    validation_split: float = 0.2
+
+
+# Used by every training of the per-symbol models, which are shared by the predictions and the portfolio forecasts
+DEFAULT_TRAINING = TrainingConfig(
+    max_epochs=settings.TRAINING_MAX_EPOCHS,
+    patience=settings.TRAINING_PATIENCE,
+    time_budget_seconds=settings.TRAINING_TIME_BUDGET_SECONDS or None,
+    batch_size=settings.TRAINING_BATCH_SIZE,
+    validation_split=settings.TRAINING_VALIDATION_SPLIT
+)
+# The shared model sees the windows of every symbol, so it trains with large batches
+SHARED_TRAINING = replace(DEFAULT_TRAINING, batch_size=settings.MODEL_SHARED_BATCH_SIZE)
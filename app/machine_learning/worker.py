@@ -0,0 +1,250 @@
+"""
+  Dedicated ML worker processes serving the model training and prediction operations.
+  The worker processes own TensorFlow and keep the models of the registry in memory, the API process only talks to them
+  through multiprocessing queues with the MLWorkerClient, so a crash of TensorFlow (e.g. out of memory) does not kill
+  the API and the ML capacity can be sized independently with ML_WORKER_PROCESSES.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import uuid
+from typing import Any, Optional
+
+from app.core.config import settings
+
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+DEFAULT_TIMEOUT_SECONDS = 900.0
+
+
+def serve(requests: multiprocessing.Queue, responses: multiprocessing.Queue) -> None:
+    """
+    Main loop of a worker process: run the requested operations until a None request is received.
+    :param requests: Queue of (request_id, operation, args, kwargs) tuples
+    :param responses: Queue of (request_id, state, payload) tuples
+    """
+    from app.machine_learning import lstm
+
+    operations = {
+        'train_model': lstm.train_model,
+        'train_shared_model': lstm.train_shared_model,
+        'forecast_prices': lstm.forecast_prices,
+        'forecast_many': lstm.forecast_many,
+    }
+    pid = os.getpid()
+    while True:
+        request = requests.get()
+        if request is None:
+            return
+
+        request_id, operation, args, kwargs = request
+        if operation not in operations:
+            responses.put((request_id, FAILED, f'Unknown ML operation {operation}...'))
+            continue
+
+        responses.put((request_id, RUNNING, pid))
+        try:
+            responses.put((request_id, SUCCEEDED, operations[operation](*args, **kwargs)))
+        except Exception as e:
+            logging.error(f'Error running ML operation {operation}: {e}')
+            responses.put((request_id, FAILED, str(e)))
+
+
+class MLWorkerClient:
+    """
+    Client of the ML worker processes, awaiting their responses from the event loop.
+    Crashed worker processes are restarted and the requests they were running fail, as well as the requests
+    no worker acknowledged yet, since the crashed worker may have dequeued them. Every request has a timeout.
+    """
+    def __init__(self, processes: int, timeout: float = DEFAULT_TIMEOUT_SECONDS):
+        self.processes = processes
+        self.timeout = timeout if timeout and timeout > 0 else DEFAULT_TIMEOUT_SECONDS
+        self._context = multiprocessing.get_context('spawn')
+        self._workers: list[multiprocessing.Process] = []
+        self._requests: Optional[multiprocessing.Queue] = None
+        self._responses: Optional[multiprocessing.Queue] = None
+        self._reader: Optional[threading.Thread] = None
+        self._pending: dict[str, tuple[asyncio.AbstractEventLoop, asyncio.Future]] = {}
+        self._running: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._stopping = False
+        self.submitted = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.restarts = 0
+
+    def start(self) -> None:
+        """
+        Start the worker processes and the thread reading their responses
+        """
+        with self._lock:
+            if self._workers:
+                return
+            self._stopping = False
+            self._requests = self._context.Queue()
+            self._responses = self._context.Queue()
+            self._workers = [self._spawn() for _ in range(self.processes)]
+            self._reader = threading.Thread(target=self._read, name='ml-worker-reader', daemon=True)
+            self._reader.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """
+        Stop the worker processes, the pending requests fail
+        """
+        with self._lock:
+            workers, self._workers = self._workers, []
+            self._stopping = True
+        if not workers:
+            return
+
+        for _ in workers:
+            self._requests.put(None)
+        for worker in workers:
+            worker.join(timeout)
+            if worker.is_alive():
+                worker.terminate()
+        if self._reader:
+            self._reader.join(timeout)
+
+        with self._lock:
+            request_ids = list(self._pending)
+        for request_id in request_ids:
+            self._resolve(request_id, FAILED, 'The ML worker was stopped...')
+
+    async def call(self, operation: str, *args, **kwargs) -> Any:
+        """
+        Run an operation in a worker process and await its result.
+        :param operation: Name of the operation (train_model, train_shared_model, forecast_prices, forecast_many)
+        :return: The result of the operation
+        :raises ValueError: If the operation failed or the worker crashed
+        """
+        self.start()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        request_id = str(uuid.uuid4())
+        with self._lock:
+            self._pending[request_id] = (loop, future)
+            self.submitted += 1
+
+        self._requests.put((request_id, operation, args, kwargs))
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            raise ValueError(f'The ML operation {operation} timed out...')
+        finally:
+            with self._lock:
+                self._pending.pop(request_id, None)
+
+    def _spawn(self) -> multiprocessing.Process:
+        worker = self._context.Process(
+            target=serve, args=(self._requests, self._responses), name='ml-worker', daemon=True
+        )
+        worker.start()
+        return worker
+
+    def _read(self) -> None:
+        while not self._stopping:
+            try:
+                self._handle(*self._responses.get(timeout=0.5))
+            except queue.Empty:
+                pass
+
+            # Check the workers after every response, not only when the queue is idle
+            with self._lock:
+                crashed = any(not worker.is_alive() for worker in self._workers)
+            if crashed:
+                # Handle the responses sent before the crash, to know which requests are still unacknowledged
+                while True:
+                    try:
+                        self._handle(*self._responses.get_nowait())
+                    except queue.Empty:
+                        break
+                self._restart_crashed_workers()
+
+    def _handle(self, request_id: str, state: str, payload: Any) -> None:
+        if state == RUNNING:
+            with self._lock:
+                self._running[request_id] = payload
+            return
+
+        with self._lock:
+            self._running.pop(request_id, None)
+        self._resolve(request_id, state, payload)
+
+    def _restart_crashed_workers(self) -> None:
+        with self._lock:
+            if self._stopping:
+                return
+            crashed_pids = set()
+            for index, worker in enumerate(self._workers):
+                if worker.is_alive():
+                    continue
+                logging.error(f'ML worker {worker.pid} stopped with exit code {worker.exitcode}, restarting it')
+                crashed_pids.add(worker.pid)
+                self._workers[index] = self._spawn()
+                self.restarts += 1
+            if not crashed_pids:
+                return
+
+            crashed = [request_id for request_id, pid in self._running.items() if pid in crashed_pids]
+            # A crashed worker may have dequeued a request without acknowledging it
+            unacknowledged = [request_id for request_id in self._pending if request_id not in self._running]
+            for request_id in crashed:
+                del self._running[request_id]
+                self._resolve_locked(request_id, FAILED, 'The ML worker stopped while running the request...')
+            for request_id in unacknowledged:
+                self._resolve_locked(request_id, FAILED, 'An ML worker stopped before starting the request...')
+
+    def _resolve(self, request_id: str, state: str, payload: Any) -> None:
+        with self._lock:
+            self._resolve_locked(request_id, state, payload)
+
+    def _resolve_locked(self, request_id: str, state: str, payload: Any) -> None:
+        entry = self._pending.get(request_id)
+        if entry is None:
+            # The caller stopped waiting for the result
+            return
+
+        if state == SUCCEEDED:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+        loop, future = entry
+        loop.call_soon_threadsafe(self._set_result, future, state, payload)
+
+    @staticmethod
+    def _set_result(future: asyncio.Future, state: str, payload: Any) -> None:
+        if future.done():
+            return
+        if state == SUCCEEDED:
+            future.set_result(payload)
+        else:
+            future.set_exception(ValueError(payload))
+
+    def stats(self) -> dict:
+        """
+        Get the ML workers counters
+        :return: dict
+        """
+        with self._lock:
+            return {
+                'processes': self.processes,
+                'alive': sum(worker.is_alive() for worker in self._workers),
+                'pending': len(self._pending),
+                'running': len(self._running),
+                'submitted': self.submitted,
+                'succeeded': self.succeeded,
+                'failed': self.failed,
+                'restarts': self.restarts,
+            }
+
+
+# The ML workers are shared by every request of the API process
+ml_worker = MLWorkerClient(
+    processes=settings.ML_WORKER_PROCESSES,
+    timeout=settings.ML_WORKER_TIMEOUT_SECONDS
+)
@@ -1,19 +1,60 @@
+import asyncio
+import logging
 import os
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.core.config import settings
+from app.core.database import db
+from app.core.executor import shutdown_executors
+from app.core.indexes import ensure_indexes
+from app.dependencies import get_forecast_scheduler
+from app.machine_learning.worker import ml_worker
+from app.services.job import job_service
+
 from app.routes import (
     user,
     auth,
     portfolio,
     asset,
     transaction,
-    prediction
+    prediction,
+    metrics,
+    job
 )
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+  """
+  Start and stop the application-wide resources
+  """
+  try:
+    await db.connect()
+    # Every failure is logged, the API still starts without the indexes
+    await ensure_indexes()
+  except Exception as e:
+    logging.error(f'Error connecting to the database: {e}')
+  ml_worker.start()
+  await job_service.start()
+  scheduler = None
+  if settings.FORECAST_SCHEDULER_ENABLED:
+    # Pre-compute the predictions of the held symbols every night
+    scheduler = asyncio.create_task(get_forecast_scheduler().run_forever())
+  yield
+  if scheduler:
+    scheduler.cancel()
+  await job_service.stop()
+  ml_worker.stop()
+  # Cancel the queued blocking work and stop the executor pools
+  shutdown_executors(wait=False)
+  db.close()
+
 # Initialize fastapi app
 app = FastAPI(
+  lifespan = lifespan,
   debug = os.getenv('DEBUG', False),
   title = os.getenv('APP_NAME', 'PortfolioPulse API'),
   description = os.getenv('APP_DESCRIPTION', 'API for PortfolioPulse'),
@@ -47,6 +88,8 @@ app.include_router(portfolio.router, prefix=prefix)
 app.include_router(asset.router, prefix=prefix)
 app.include_router(transaction.router, prefix=prefix)
 app.include_router(prediction.router, prefix=prefix)
+app.include_router(metrics.router, prefix=prefix)
+app.include_router(job.router, prefix=prefix)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,14 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+from app.models.asset import Asset
+
+
+class Position(BaseModel):
+  asset_id: str
+  portfolio_id: str
+  shares: float = 0.0
+  cost_basis: float = 0.0
+  transactions: int = 0
+  asset: Optional[Asset] = None
@@ -9,9 +9,24 @@ class Prediction(BaseModel):
     predicated_dates: list[str]
     predicated_prices: list[float]
     predicated_days: int
+    model: str = 'lstm'
+    data_cutoff: Optional[str] = None
+    expires_at: Optional[datetime] = None
+    # Mongo deletes the prediction once this date is reached (TTL index)
+    purge_at: Optional[datetime] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+    def is_fresh(self) -> bool:
+        """
+        Check if the prediction can be served without refreshing it
+        :return: bool
+        """
+        if self.expires_at is None:
+            return False
+        expires_at = self.expires_at if self.expires_at.tzinfo else self.expires_at.replace(tzinfo=timezone.utc)
+        return expires_at > datetime.now(timezone.utc)
+
     class Config:
         arbitrary_types_allowed = True
         json_encoders = {
@@ -1,4 +1,7 @@
 from bson import ObjectId
+from bson.errors import InvalidId
+from typing import Optional
+
 from pymongo.results import InsertOneResult
 from sqlalchemy.testing.plugin.plugin_base import logging
 
@@ -6,6 +9,9 @@ from app.core.database import db
 from app.models.asset import Asset
 from app.schemas.asset import AssetResponse
 
+# Fields of an AssetResponse, the holdings do not need the rest of the document
+ASSET_PROJECTION = {field: True for field in AssetResponse.model_fields if field != 'id'}
+
 
 class AssetRepository:
     """
@@ -83,8 +89,39 @@ class AssetRepository:
         """
         return await self.collection.find_one({'symbol': symbol})
 
-    # async def find_assets_by_ids(self, asset_ids: list) -> list:
-    #
-    #     assets = await self.collection.find_many({'_id': {'$in': asset_ids}})
-    #     # assets = await self.collection.findMany({'_id': {'$in': asset_ids}})
-    #     return assets
+    async def fetch_distinct_symbols(self) -> list[str]:
+        """
+        Get every symbol held by at least one portfolio
+        :return: list[str]
+        """
+        symbols = await self.collection.distinct('symbol', {'portfolio_ids.0': {'$exists': True}})
+        return sorted(symbol for symbol in symbols if symbol)
+
+    async def find_assets_by_ids(
+        self,
+        asset_ids: list[str],
+        projection: Optional[dict] = None
+    ) -> tuple[list[dict], list[str]]:
+        """
+        Find many assets by ID in a single query
+        :param asset_ids: list[str]
+        :param projection: Fields to return, defaults to the whole documents
+        :return: Tuple (assets in the order of asset_ids, with their 'id', IDs of the assets not found)
+        """
+        asset_ids = list(dict.fromkeys(str(asset_id) for asset_id in asset_ids))
+        object_ids = []
+        for asset_id in asset_ids:
+            try:
+                object_ids.append(ObjectId(asset_id))
+            except InvalidId:
+                pass
+
+        found = {}
+        if object_ids:
+            async for asset in self.collection.find({'_id': {'$in': object_ids}}, projection):
+                asset['id'] = str(asset['_id'])
+                found[asset['id']] = asset
+
+        assets = [found[asset_id] for asset_id in asset_ids if asset_id in found]
+        missing = [asset_id for asset_id in asset_ids if asset_id not in found]
+        return assets, missing
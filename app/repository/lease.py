@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta, timezone
+
+from pymongo.errors import DuplicateKeyError
+
+from app.core.database import db
+
+
+class LeaseRepository:
+    """
+    Lease repository class, so a task started by every API worker only runs in one of them.
+    """
+    def __init__(self):
+        self.collection = db.get_collection('leases')
+
+    async def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        """
+        Take a lease unless another owner holds it: the first insert of a key wins, the others collide on its _id.
+        :param key: Name of the lease, e.g. the task and the date of its run.
+        :param owner: Identifier of the process taking the lease.
+        :param ttl: Time to live in seconds, the lease document is deleted once expired.
+        :return: True if the lease was taken by this owner.
+        """
+        now = datetime.now(timezone.utc)
+        try:
+            await self.collection.insert_one({
+                '_id': key,
+                'owner': owner,
+                'acquired_at': now,
+                'expires_at': now + timedelta(seconds=ttl)
+            })
+            return True
+        except DuplicateKeyError:
+            return False
+        except Exception as e:
+            raise ValueError(str(e))
@@ -3,7 +3,9 @@ from pymongo.results import InsertOneResult
 
 from app.core.database import db
 from app.models.portfolio import Portfolio
+from app.models.position import Position
 from app.models.transaction import Transaction
+from app.repository.position import ASSET_LOOKUP, ledger_pipeline
 
 
 class PortfolioRepository:
@@ -92,3 +94,19 @@ class PortfolioRepository:
             return transactions
         except Exception as e:
             raise ValueError(str(e))
+
+    async def fetch_positions(self, portfolio_id: str) -> dict[str, Position]:
+        """
+        Aggregate the transactions of a portfolio into one position per asset on the database side,
+        joined to the asset metadata, so the transactions themselves never leave Mongo.
+        :param portfolio_id: str
+        :return: dict mapping each asset ID to its Position (net shares, cost basis, transaction count, asset)
+        """
+        pipeline = [*ledger_pipeline(portfolio_id), *ASSET_LOOKUP]
+        try:
+            positions = {}
+            async for position in self.transaction_collection.aggregate(pipeline):
+                positions[position['asset_id']] = Position(**position)
+            return positions
+        except Exception as e:
+            raise ValueError(str(e))
@@ -0,0 +1,264 @@
+import asyncio
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from pymongo import DeleteOne, ReplaceOne
+from pymongo.errors import DuplicateKeyError
+from pymongo.results import UpdateResult
+
+from app.core.database import db
+from app.models.position import Position
+from app.repository.asset import ASSET_PROJECTION
+
+# Join a position to the metadata of its asset, referenced by its string ID in `asset_id`
+ASSET_LOOKUP = [
+    {'$lookup': {
+        'from': 'assets',
+        # A malformed ID matches no asset instead of failing the pipeline
+        'let': {'asset_id': {'$convert': {'input': '$asset_id', 'to': 'objectId', 'onError': None}}},
+        'pipeline': [
+            {'$match': {'$expr': {'$eq': ['$_id', '$$asset_id']}}},
+            {'$project': ASSET_PROJECTION},
+            {'$set': {'id': {'$toString': '$_id'}}},
+        ],
+        'as': 'asset',
+    }},
+    {'$set': {'asset': {'$first': '$asset'}}},
+]
+# A portfolio still being seeded after this delay is seeded again by the next writer, the first one stopped
+SEED_TIMEOUT_SECONDS = 30
+
+
+def ledger_pipeline(portfolio_id: Optional[str] = None) -> list[dict]:
+    """
+    Aggregation pipeline computing the positions from the transactions ledger
+    :param portfolio_id: Only the positions of this portfolio, defaults to every portfolio
+    :return: list of stages, each output document has portfolio_id, asset_id, shares, cost_basis and transactions
+    """
+    match = {'portfolio_id': portfolio_id} if portfolio_id else {}
+    return [
+        {'$match': match},
+        {'$group': {
+            '_id': {'portfolio_id': '$portfolio_id', 'asset_id': '$asset_id'},
+            'shares': {'$sum': '$shares'},
+            'cost_basis': {'$sum': {'$multiply': ['$shares', '$price_per_share']}},
+            'transactions': {'$sum': 1},
+        }},
+        {'$project': {
+            '_id': False,
+            'portfolio_id': '$_id.portfolio_id',
+            'asset_id': '$_id.asset_id',
+            'shares': True,
+            'cost_basis': True,
+            'transactions': True,
+        }},
+    ]
+
+
+class PositionRepository:
+    """
+    Position snapshots of the portfolios, one document per (portfolio, asset), kept up to date by applying
+    the delta of every transaction write, so reading the holdings does not scan the transactions.
+    The snapshots of a portfolio are only used once they were seeded from its ledger, which is recorded
+    with a marker per portfolio: the portfolios with transactions from before the snapshots still read the ledger.
+    Every transaction write first makes sure its portfolio is seeded, the writer inserting the marker seeds it
+    and the others wait for it, so no transaction is written while the ledger is read and counted twice.
+    """
+    def __init__(self):
+        self.collection = db.get_collection('positions')
+        self.transaction_collection = db.get_collection('transactions')
+        self.marker_collection = db.get_collection('position_portfolios')
+
+    async def is_initialized(self, portfolio_id: str) -> bool:
+        """
+        Check if the snapshots of a portfolio were seeded from its ledger
+        :param portfolio_id: str
+        :return: bool
+        """
+        return await self.marker_collection.find_one({'_id': portfolio_id, 'state': {'$ne': 'seeding'}}) is not None
+
+    async def mark_initialized(self, portfolio_ids: list[str]) -> None:
+        """
+        Record that the snapshots of portfolios were seeded from their ledger
+        :param portfolio_ids: list[str]
+        """
+        for portfolio_id in portfolio_ids:
+            await self.marker_collection.update_one(
+                {'_id': portfolio_id},
+                {'$set': {'state': 'ready'}, '$currentDate': {'initialized_at': True}},
+                upsert=True
+            )
+
+    async def ensure_initialized(self, portfolio_id: str) -> None:
+        """
+        Seed the snapshots of a portfolio from its ledger unless it was done, called before writing a transaction.
+        Only the writer inserting the marker seeds them, the others wait until it is done.
+        :param portfolio_id: str
+        """
+        while True:
+            marker = await self.marker_collection.find_one({'_id': portfolio_id})
+            if marker is None:
+                try:
+                    await self.marker_collection.insert_one({
+                        '_id': portfolio_id, 'state': 'seeding', 'seeding_since': datetime.now(timezone.utc)
+                    })
+                except DuplicateKeyError:
+                    # Another writer is seeding it
+                    continue
+                await self._seed(portfolio_id)
+                return
+            if marker.get('state') != 'seeding':
+                return
+
+            expired = datetime.now(timezone.utc) - timedelta(seconds=SEED_TIMEOUT_SECONDS)
+            taken = await self.marker_collection.update_one(
+                {'_id': portfolio_id, 'state': 'seeding', 'seeding_since': {'$lt': expired}},
+                {'$set': {'seeding_since': datetime.now(timezone.utc)}}
+            )
+            if taken.modified_count:
+                await self._seed(portfolio_id)
+                return
+            await asyncio.sleep(0.05)
+
+    async def _seed(self, portfolio_id: str) -> None:
+        try:
+            await self.rebuild(portfolio_id)
+        except Exception:
+            # Let the next writer seed it right away
+            await self.marker_collection.delete_one({'_id': portfolio_id, 'state': 'seeding'})
+            raise
+
+    async def apply_delta(
+        self,
+        portfolio_id: str,
+        asset_id: str,
+        shares: float,
+        cost_basis: float,
+        transactions: int
+    ) -> UpdateResult:
+        """
+        Atomically add a delta to the position of an asset, creating the position if needed.
+        Called after the transaction is written, its portfolio was seeded before with ensure_initialized.
+        :param portfolio_id: str
+        :param asset_id: str
+        :param shares: Shares to add (negative to remove)
+        :param cost_basis: Cost to add (negative to remove)
+        :param transactions: Number of transactions to add (1 on create, -1 on delete, 0 on update)
+        :return: UpdateResult
+        """
+        try:
+            result = await self.collection.update_one(
+                {'portfolio_id': portfolio_id, 'asset_id': asset_id},
+                {
+                    '$inc': {'shares': shares, 'cost_basis': cost_basis, 'transactions': transactions},
+                    '$currentDate': {'updated_at': True}
+                },
+                upsert=True
+            )
+            if transactions < 0:
+                # The last transaction of the asset was deleted
+                await self.collection.delete_one(
+                    {'portfolio_id': portfolio_id, 'asset_id': asset_id, 'transactions': {'$lte': 0}}
+                )
+            return result
+        except Exception as e:
+            raise ValueError(str(e))
+
+    async def fetch_positions(self, portfolio_id: str) -> dict[str, Position]:
+        """
+        Fetch the position snapshots of a portfolio, joined to the asset metadata
+        :param portfolio_id: str
+        :return: dict mapping each asset ID to its Position
+        """
+        pipeline = [{'$match': {'portfolio_id': portfolio_id}}, *ASSET_LOOKUP]
+        try:
+            positions = {}
+            async for position in self.collection.aggregate(pipeline):
+                positions[position['asset_id']] = Position(**position)
+            return positions
+        except Exception as e:
+            raise ValueError(str(e))
+
+    async def fetch_ledger_positions(self, portfolio_id: Optional[str] = None) -> list[Position]:
+        """
+        Recompute the positions from the transactions ledger
+        :param portfolio_id: Only the positions of this portfolio, defaults to every portfolio
+        :return: list[Position]
+        """
+        cursor = self.transaction_collection.aggregate(ledger_pipeline(portfolio_id))
+        return [Position(**position) async for position in cursor]
+
+    async def fetch_snapshots(self, portfolio_id: Optional[str] = None) -> list[Position]:
+        """
+        Fetch the position snapshots, without the asset metadata
+        :param portfolio_id: Only the positions of this portfolio, defaults to every portfolio
+        :return: list[Position]
+        """
+        cursor = self.collection.find({'portfolio_id': portfolio_id} if portfolio_id else {})
+        return [Position(**position) async for position in cursor]
+
+    async def rebuild(self, portfolio_id: Optional[str] = None) -> dict:
+        """
+        Replace the position snapshots with the positions recomputed from the transactions ledger
+        :param portfolio_id: Only rebuild this portfolio, defaults to every portfolio
+        :return: dict with the number of positions written and deleted
+        """
+        positions = await self.fetch_ledger_positions(portfolio_id)
+        portfolio_ids = [portfolio_id] if portfolio_id else list({position.portfolio_id for position in positions})
+        operations = [
+            ReplaceOne(
+                {'portfolio_id': position.portfolio_id, 'asset_id': position.asset_id},
+                position.model_dump(exclude={'asset'}),
+                upsert=True
+            )
+            for position in positions
+        ]
+        # The snapshots of the assets without any transaction left
+        keys = {(position.portfolio_id, position.asset_id) for position in positions}
+        operations += [
+            DeleteOne({'portfolio_id': snapshot.portfolio_id, 'asset_id': snapshot.asset_id})
+            for snapshot in await self.fetch_snapshots(portfolio_id)
+            if (snapshot.portfolio_id, snapshot.asset_id) not in keys
+        ]
+        deleted = 0
+        try:
+            if operations:
+                deleted = (await self.collection.bulk_write(operations)).deleted_count
+            await self.mark_initialized(portfolio_ids)
+        except Exception as e:
+            raise ValueError(str(e))
+        return {'positions': len(positions), 'deleted': deleted}
+
+    async def verify(self, portfolio_id: Optional[str] = None, tolerance: float = 1e-6) -> dict:
+        """
+        Compare the position snapshots with the positions recomputed from the transactions ledger
+        :param portfolio_id: Only verify this portfolio, defaults to every portfolio
+        :param tolerance: Relative tolerance of the floating point sums
+        :return: dict with the number of positions checked and the mismatches
+        """
+        ledger = {
+            (position.portfolio_id, position.asset_id): position
+            for position in await self.fetch_ledger_positions(portfolio_id)
+        }
+        snapshots = {
+            (position.portfolio_id, position.asset_id): position
+            for position in await self.fetch_snapshots(portfolio_id)
+        }
+
+        mismatches = []
+        for key in sorted(ledger.keys() | snapshots.keys(), key=str):
+            expected, actual = ledger.get(key), snapshots.get(key)
+            if (
+                expected is None or actual is None
+                or expected.transactions != actual.transactions
+                or not math.isclose(expected.shares, actual.shares, rel_tol=tolerance, abs_tol=tolerance)
+                or not math.isclose(expected.cost_basis, actual.cost_basis, rel_tol=tolerance, abs_tol=tolerance)
+            ):
+                mismatches.append({
+                    'portfolio_id': key[0],
+                    'asset_id': key[1],
+                    'ledger': expected.model_dump(exclude={'asset'}) if expected else None,
+                    'snapshot': actual.model_dump(exclude={'asset'}) if actual else None,
+                })
+        return {'positions': len(ledger), 'mismatches': mismatches}
@@ -2,7 +2,7 @@ from datetime import datetime, timedelta
 from typing import Any, Mapping
 
 from bson import ObjectId
-from pymongo.results import InsertOneResult
+from pymongo.results import UpdateResult
 
 from app.core.database import db
 from app.models.prediction import Prediction
@@ -22,21 +22,26 @@ class PredictionRepository:
         :param period: Number of days to predict.
         :return: PredictionResponse object.
         """
-        prediction_data = await self.collection.find_one({
-            'symbol': symbol,
-            'predicated_days': period
-        })
+        prediction_data = await self.collection.find_one(
+            {'symbol': symbol, 'predicated_days': period},
+            sort=[('updated_at', -1)]
+        )
 
         return prediction_data if prediction_data else None
 
-    async def save_prediction(self, prediction: dict) -> InsertOneResult:
+    async def save_prediction(self, prediction: dict) -> UpdateResult:
         """
-        Save a prediction to the database.
+        Save a prediction to the database, replacing the previous prediction of the symbol for the same period.
         :param prediction: Prediction
-        :return: InsertOneResult
+        :return: UpdateResult
         """
+        fields = {key: value for key, value in prediction.items() if key not in ('id', '_id', 'created_at')}
         try:
-            return await self.collection.insert_one(prediction)
+            return await self.collection.update_one(
+                {'symbol': prediction['symbol'], 'predicated_days': prediction['predicated_days']},
+                {'$set': fields, '$setOnInsert': {'created_at': prediction['created_at']}},
+                upsert=True
+            )
         except Exception as e:
             raise ValueError(str(e))
 
@@ -0,0 +1,114 @@
+import os
+import threading
+from typing import Optional
+
+import numpy as np
+
+OHLCV_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+BAR_DTYPE = np.dtype([('date', 'datetime64[D]')] + [(field, 'f8') for field in OHLCV_FIELDS])
+
+
+class PriceHistoryRepository:
+    """
+    Local price history store, keeping the daily OHLCV bars of every symbol on disk.
+    Each symbol is a single NumPy file that is memory-mapped on read, so date-range slices
+    are served without parsing anything, and replaced atomically on write.
+    """
+    def __init__(self, root: str):
+        self.root = root
+        self._bars: dict[str, tuple[float, np.ndarray]] = {}
+        self._locks: dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, symbol: str) -> str:
+        return os.path.join(self.root, f'{symbol.upper()}.npy')
+
+    def symbols(self) -> list[str]:
+        """
+        Get every stored symbol
+        :return: list[str]
+        """
+        return sorted(entry.removesuffix('.npy') for entry in os.listdir(self.root) if entry.endswith('.npy'))
+
+    def lock(self, symbol: str) -> threading.Lock:
+        """
+        Get the lock serializing the refreshes of a symbol
+        :param symbol: str
+        :return: threading.Lock
+        """
+        with self._locks_guard:
+            return self._locks.setdefault(symbol.upper(), threading.Lock())
+
+    def load(self, symbol: str) -> Optional[np.ndarray]:
+        """
+        Load every stored bar of a symbol, sorted by date.
+        :param symbol: str
+        :return: Memory-mapped structured array or None if the symbol is not stored
+        """
+        path = self._path(symbol)
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            return None
+
+        cached = self._bars.get(symbol.upper())
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        bars = np.load(path, mmap_mode='r')
+        self._bars[symbol.upper()] = (mtime, bars)
+        return bars
+
+    def date_bounds(self, symbol: str) -> Optional[tuple[np.datetime64, np.datetime64]]:
+        """
+        Get the first and last stored dates of a symbol.
+        :param symbol: str
+        :return: Tuple (first_date, last_date) or None if the symbol is not stored
+        """
+        bars = self.load(symbol)
+        if bars is None or len(bars) == 0:
+            return None
+        return bars['date'][0], bars['date'][-1]
+
+    def get_range(self, symbol: str, start: Optional[str] = None, end: Optional[str] = None) -> np.ndarray:
+        """
+        Get the bars of a symbol between two dates, as a view on the stored file.
+        :param symbol: str
+        :param start: Start date (inclusive, format: YYYY-MM-DD).
+        :param end: End date (exclusive, format: YYYY-MM-DD).
+        :return: Structured array with the BAR_DTYPE fields
+        """
+        bars = self.load(symbol)
+        if bars is None:
+            return np.empty(0, dtype=BAR_DTYPE)
+
+        dates = bars['date']
+        lower = np.searchsorted(dates, np.datetime64(start, 'D'), side='left') if start else 0
+        upper = np.searchsorted(dates, np.datetime64(end, 'D'), side='left') if end else len(bars)
+        return bars[lower:upper]
+
+    def upsert(self, symbol: str, bars: np.ndarray) -> int:
+        """
+        Merge new bars into the stored history of a symbol, the new bars win on overlapping dates.
+        :param symbol: str
+        :param bars: Structured array with the BAR_DTYPE fields
+        :return: Number of stored bars
+        """
+        if len(bars) == 0:
+            stored = self.load(symbol)
+            return 0 if stored is None else len(stored)
+
+        bars = np.sort(np.asarray(bars, dtype=BAR_DTYPE), order='date')
+        stored = self.load(symbol)
+        if stored is not None and len(stored):
+            keep = ~np.isin(stored['date'], bars['date'])
+            bars = np.sort(np.concatenate([stored[keep], bars]), order='date')
+
+        path = self._path(symbol)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as file:
+            np.save(file, bars)
+        os.replace(tmp_path, path)
+        self._bars.pop(symbol.upper(), None)
+        return len(bars)
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from app.core.database import db
+from app.utils.cache import CacheBackend
+
+
+class QuoteRepository(CacheBackend):
+    """
+    Quote repository class, used as a shared quote cache between the API workers.
+    """
+    def __init__(self):
+        self.collection = db.get_collection('quotes')
+
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        Fetch a cached quote if it did not expire yet.
+        :param key: Stock symbol.
+        :return: The cached price or None.
+        """
+        quote = await self.collection.find_one({
+            '_id': key,
+            'expires_at': {'$gt': datetime.now(timezone.utc)}
+        })
+        return quote['price'] if quote else None
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        """
+        Save a quote with its expiration date.
+        :param key: Stock symbol.
+        :param value: Price of the symbol.
+        :param ttl: Time to live in seconds.
+        """
+        now = datetime.now(timezone.utc)
+        try:
+            await self.collection.update_one(
+                {'_id': key},
+                {'$set': {
+                    'price': value,
+                    'fetched_at': now,
+                    'expires_at': now + timedelta(seconds=ttl)
+                }},
+                upsert=True
+            )
+        except Exception as e:
+            raise ValueError(str(e))
@@ -0,0 +1,129 @@
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+
+from app.dependencies import get_current_user, get_job_service, get_portfolio_service, get_prediction_service
+from app.schemas.job import JobResponse
+from app.schemas.user import UserResponse
+from app.services.job import JobService
+from app.services.portfolio import PortfolioService
+from app.services.prediction import PredictionService
+
+router = APIRouter(
+    prefix='/jobs',
+    tags=['job']
+)
+
+@router.post(
+    '/predictions/{symbol}/{period}',
+    response_model=JobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    description='Submit a background job computing the prediction for a symbol',
+    response_description='Job submitted successfully'
+)
+async def submit_prediction_job(
+    symbol: str,
+    period: int = 30,
+    job_service: JobService = Depends(get_job_service),
+    prediction_service: PredictionService = Depends(get_prediction_service),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    """
+    Submit a job computing the predictions for a symbol for the next `period` days.
+    :param symbol: Stock symbol to predict.
+    :param period: Number of days to predict.
+    :return: JobResponse object, poll it until its status is succeeded or failed.
+    """
+    user = await current_user
+    return await job_service.submit(
+        kind='prediction',
+        params={'symbol': symbol.upper(), 'period': period},
+        run=lambda: prediction_service.fetch_prediction_for_symbol(symbol, period, fallback=False),
+        user_id=user.id
+    )
+
+@router.post(
+    '/portfolio/{portfolio_id}/lstm-predictions',
+    response_model=JobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    description='Submit a background job computing the LSTM predictions of the holdings in the portfolio',
+    response_description='Job submitted successfully'
+)
+async def submit_portfolio_predictions_job(
+    portfolio_id: str,
+    days: int = 7,
+    job_service: JobService = Depends(get_job_service),
+    portfolio_service: PortfolioService = Depends(get_portfolio_service),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    """
+    Submit a job predicting future prices for all holdings in a portfolio using LSTM.
+    :param portfolio_id: Portfolio ID
+    :param days: Number of days to predict future prices
+    :return: JobResponse object, poll it until its status is succeeded or failed.
+    """
+    user = await current_user
+    try:
+        # Check the permission before queuing the job
+        await portfolio_service.get_portfolio(portfolio_id, user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+    async def run():
+        predictions = await portfolio_service.get_lstm_predictions_for_holdings(portfolio_id, user.id, days)
+        return {
+            'portfolio_id': portfolio_id,
+            'predictions': predictions
+        }
+
+    return await job_service.submit(
+        kind='portfolio_lstm_predictions',
+        params={'portfolio_id': portfolio_id, 'days': days},
+        run=run,
+        user_id=user.id
+    )
+
+@router.get(
+    '/{job_id}',
+    response_model=JobResponse,
+    status_code=status.HTTP_200_OK,
+    description='Get the status of a background job, and its result once finished',
+    response_description='Job retrieved successfully'
+)
+async def get_job(
+    job_id: str,
+    job_service: JobService = Depends(get_job_service),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    user = await current_user
+    try:
+        return job_service.get_job(job_id, user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+@router.get(
+    '/{job_id}/events',
+    status_code=status.HTTP_200_OK,
+    description='Stream the status changes of a background job as server-sent events, until it is finished',
+    response_description='Job events streamed successfully'
+)
+async def stream_job_events(
+    job_id: str,
+    job_service: JobService = Depends(get_job_service),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    user = await current_user
+    try:
+        job_service.get_job(job_id, user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+    async def events():
+        try:
+            async for job in job_service.watch(job_id, user.id):
+                yield f'event: {job.status.value}\ndata: {JobResponse.model_validate(job).model_dump_json()}\n\n'
+        except ValueError as e:
+            logging.error(f'Error streaming job events: {e}')
+
+    return StreamingResponse(events(), media_type='text/event-stream')
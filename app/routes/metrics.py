@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends
+
+from app.core.database import db
+from app.core.executor import executors_stats
+from app.dependencies import get_current_user
+from app.machine_learning.worker import ml_worker
+from app.services.job import job_service
+from app.services.market_data import market_data_service
+from app.schemas.user import UserResponse
+from app.services.prediction import prediction_flight
+
+router = APIRouter(
+    prefix='/metrics',
+    tags=['metrics']
+)
+
+@router.get(
+    '/',
+    status_code=200,
+    description='Get the runtime metrics of the API worker',
+    response_description='Metrics retrieved successfully'
+)
+async def get_metrics(current_user: UserResponse = Depends(get_current_user)):
+    """
+    Obtain the runtime metrics of the API worker, such as the Mongo pool utilization, the quote cache counters
+    and the executors and jobs queue depth.
+    :return: Dictionary with the metrics of each subsystem.
+    """
+    await current_user
+    return {
+        'mongo': db.stats(),
+        'quote_cache': market_data_service.stats(),
+        'executors': executors_stats(),
+        'jobs': job_service.stats(),
+        'ml_worker': ml_worker.stats(),
+        'predictions': {'single_flight': prediction_flight.stats()}
+    }
@@ -21,17 +21,19 @@ router = APIRouter(
 async def get_prediction(
     symbol: str,
     period: int = 30,
+    model: str = 'lstm',
     prediction_service: PredictionService = Depends(get_prediction_service)
 ):
     """
     Obtain the predictions for a symbol for the next `days` days.
     :param period: Number of days to predict.
+    :param model: "lstm" or a fast baseline forecaster (ewma, drift, seasonal_naive, ridge).
     :param prediction_service: PredictionService object.
     :param symbol: Stock symbol to predict.
     :return: PredictionResponse object.
     """
     try:
-        return await prediction_service.fetch_prediction_for_symbol(symbol, period)
+        return await prediction_service.fetch_prediction_for_symbol(symbol, period, model)
     except ValueError as e:
         logging.error(f'Error fetching prediction: {e}')
         raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,21 @@
+from datetime import datetime
+from typing import Any, Optional
+
+from pydantic import BaseModel
+
+from app.models.job import JobStatus
+
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    params: dict
+    status: JobStatus
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
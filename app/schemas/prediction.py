@@ -7,5 +7,8 @@ class PredictionResponse(BaseModel):
     predicated_dates: List[str]
     predicated_prices: List[float]
     predicated_days: int
+    model: str = 'lstm'
+    data_cutoff: Optional[str] = None
+    expires_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
@@ -1,7 +1,7 @@
 from pymongo.results import InsertOneResult
 
 from app.models.asset import Asset
-from app.repository.asset import AssetRepository
+from app.repository.asset import ASSET_PROJECTION, AssetRepository
 from app.schemas.asset import AssetResponse, AssetUpdate, AssetCreate
 
 
@@ -110,14 +110,11 @@ class AssetService:
             return None
         return Asset(**asset)
 
-    # Fetch a list of assets by their ID's
-    async def get_assets_by_ids(self, asset_ids: list[str]) -> list[Asset]:
+    async def get_assets_by_ids(self, asset_ids: list[str]) -> tuple[list[AssetResponse], list[str]]:
         """
-        Fetch a list of assets by their ID's
+        Fetch a list of assets by their ID's in a single query
         :param asset_ids: list[str]
-        :rtype: list[Asset]
+        :return: Tuple (assets in the order of asset_ids, IDs of the assets not found)
         """
-        assets: list[dict] = await self.repository.find_assets_by_ids(asset_ids)
-        if assets:
-            return [Asset(**asset) for asset in assets]
-        raise ValueError('No assets found...')
+        assets, missing = await self.repository.find_assets_by_ids(asset_ids, ASSET_PROJECTION)
+        return [AssetResponse(**asset) for asset in assets], missing
@@ -0,0 +1,180 @@
+import asyncio
+import json
+import logging
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+from app.core.config import settings
+from app.models.job import Job, JobStatus
+
+
+class JobService:
+    """
+    In-process background job queue, used to run model training and predictions outside of the HTTP requests.
+    Identical jobs submitted while one is pending or running share the same job.
+    A job is only visible to the user who submitted it, the jobs submitted by the API itself have no owner.
+    """
+    def __init__(self, max_workers: int, history_size: int = 1000):
+        self.max_workers = max_workers
+        self.history_size = history_size
+        self.jobs: OrderedDict[str, Job] = OrderedDict()
+        self._runs: dict[str, Callable[[], Awaitable[Any]]] = {}
+        self._in_flight: dict[str, str] = {}
+        self._changed: dict[str, asyncio.Event] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: list[asyncio.Task] = []
+        self.deduplicated = 0
+
+    @staticmethod
+    def dedup_key(kind: str, params: dict, user_id: Optional[str] = None) -> str:
+        return json.dumps([kind, user_id, params], sort_keys=True, default=str)
+
+    async def start(self) -> None:
+        """
+        Start the workers consuming the queue
+        """
+        if self._workers:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_workers)]
+
+    async def stop(self) -> None:
+        """
+        Stop the workers, the pending and running jobs fail, so an identical job submitted later runs again
+        """
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        for job in self.jobs.values():
+            if not job.is_finished:
+                self._update(job, status=JobStatus.FAILED, error='The job service stopped before the job finished...')
+                job.finished_at = datetime.now(timezone.utc)
+                self._notify(job)
+        self._in_flight.clear()
+        self._runs.clear()
+        self._queue = None
+
+    async def submit(
+        self,
+        kind: str,
+        params: dict,
+        run: Callable[[], Awaitable[Any]],
+        user_id: Optional[str] = None
+    ) -> Job:
+        """
+        Submit a job, or get the identical job already pending or running.
+        :param kind: Kind of job (e.g. "prediction").
+        :param params: Parameters of the job, used to detect identical jobs.
+        :param run: Coroutine function running the job and returning its JSON serializable result.
+        :param user_id: Owner of the job, None for the internal jobs that no user can see.
+        :return: Job
+        """
+        await self.start()
+        key = self.dedup_key(kind, params, user_id)
+        job_id = self._in_flight.get(key)
+        if job_id is not None:
+            self.deduplicated += 1
+            return self.jobs[job_id]
+
+        job = Job(id=str(uuid.uuid4()), kind=kind, params=params, user_id=user_id)
+        self.jobs[job.id] = job
+        self._runs[job.id] = run
+        self._in_flight[key] = job.id
+        self._changed[job.id] = asyncio.Event()
+        self._forget_finished_jobs()
+        await self._queue.put(job.id)
+        return job
+
+    def get_job(self, job_id: str, user_id: Optional[str] = None) -> Job:
+        """
+        Get a job by its ID
+        :param job_id: str
+        :param user_id: The current user ID, jobs of other users are not visible
+        :return: Job
+        :raises ValueError: If the job is not found
+        """
+        job = self.jobs.get(job_id)
+        if not job or job.user_id is None or job.user_id != user_id:
+            raise ValueError('Job not found...')
+        return job
+
+    async def watch(self, job_id: str, user_id: Optional[str] = None) -> AsyncIterator[Job]:
+        """
+        Yield the job every time its status changes, until it is finished
+        :param job_id: str
+        :param user_id: The current user ID
+        """
+        job = self.get_job(job_id, user_id)
+        while True:
+            changed = self._changed.get(job_id)
+            yield job
+            if job.is_finished or changed is None:
+                return
+            await changed.wait()
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        job = self.jobs.get(job_id)
+        run = self._runs.pop(job_id, None)
+        if job is None or run is None:
+            return
+
+        self._update(job, status=JobStatus.RUNNING, started_at=datetime.now(timezone.utc))
+        try:
+            result = await run()
+            self._update(job, status=JobStatus.SUCCEEDED, result=result)
+        except Exception as e:
+            logging.error(f'Error running job {job.kind} {job.id}: {e}')
+            self._update(job, status=JobStatus.FAILED, error=str(e))
+        finally:
+            self._in_flight.pop(self.dedup_key(job.kind, job.params, job.user_id), None)
+            job.finished_at = datetime.now(timezone.utc)
+            self._notify(job)
+
+    def _update(self, job: Job, **changes) -> None:
+        for field, value in changes.items():
+            setattr(job, field, value)
+        if not job.is_finished:
+            self._notify(job)
+
+    def _notify(self, job: Job) -> None:
+        changed = self._changed.pop(job.id, None)
+        if not job.is_finished:
+            self._changed[job.id] = asyncio.Event()
+        if changed is not None:
+            changed.set()
+
+    def _forget_finished_jobs(self) -> None:
+        finished = [job_id for job_id, job in self.jobs.items() if job.is_finished]
+        for job_id in finished[:max(0, len(self.jobs) - self.history_size)]:
+            del self.jobs[job_id]
+
+    def stats(self) -> dict:
+        """
+        Get the job queue counters
+        :return: dict
+        """
+        statuses = {status.value: 0 for status in JobStatus}
+        for job in self.jobs.values():
+            statuses[job.status.value] += 1
+        return {
+            'workers': self.max_workers,
+            'queue_depth': self._queue.qsize() if self._queue else 0,
+            'deduplicated': self.deduplicated,
+            **statuses,
+        }
+
+
+# The job queue is shared by every request of the worker
+job_service = JobService(max_workers=settings.JOB_WORKERS, history_size=settings.JOB_HISTORY_SIZE)
@@ -0,0 +1,314 @@
+import asyncio
+import functools
+import logging
+import time
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from app.core.config import settings
+from app.core.executor import run_io
+from app.repository.price_history import BAR_DTYPE, OHLCV_FIELDS, PriceHistoryRepository
+from app.utils.cache import CacheBackend, TTLCache
+from app.utils.singleflight import SingleFlight
+
+
+class MarketDataService:
+    """
+    Market data service class to handle every live market data lookup, with a quote cache in front of Yahoo Finance
+    """
+    def __init__(
+        self,
+        quote_cache: TTLCache,
+        price_history: PriceHistoryRepository,
+        quote_backend: Optional[CacheBackend] = None
+    ):
+        self.quote_cache = quote_cache
+        self.price_history = price_history
+        self.quote_backend = quote_backend
+        self.backend_hits = 0
+        # Concurrent lookups of the same missing quote share one fetch
+        self.quote_flight = SingleFlight()
+        # Last refresh of the history tail and earliest start already fetched, by symbol
+        self._history_refreshed_at: dict[str, float] = {}
+        self._history_start: dict[str, str] = {}
+
+    async def get_current_price(self, symbol: str) -> float:
+        """
+        Get the current price of an asset, served from the quote cache while it is fresh.
+        :param symbol: str
+        :return: float
+        """
+        price = self.quote_cache.get(symbol)
+        if price is not None:
+            return price
+
+        return await self.quote_flight.do(symbol, functools.partial(self._load_quote, symbol))
+
+    async def get_current_prices(self, symbols: list[str]) -> dict[str, float]:
+        """
+        Get the current prices of several assets, fetching every symbol missing from the cache in batched requests,
+        except the symbols already being fetched by another request.
+        :param symbols: list[str]
+        :return: dict[str, float] mapping each symbol to its price (0.0 when unavailable)
+        """
+        prices = {}
+        missing = []
+        for symbol in dict.fromkeys(symbols):
+            price = self.quote_cache.get(symbol)
+            if price is None:
+                price = await self._get_backend_quote(symbol)
+                if price is not None:
+                    self.backend_hits += 1
+                    self.quote_cache.set(symbol, price)
+            if price is None:
+                missing.append(symbol)
+            else:
+                prices[symbol] = price
+
+        calls = {}
+        to_fetch = [symbol for symbol in missing if not self.quote_flight.in_flight(symbol)]
+        for start in range(0, len(to_fetch), settings.QUOTE_BATCH_SIZE):
+            batch = to_fetch[start:start + settings.QUOTE_BATCH_SIZE]
+            fetched = asyncio.ensure_future(self._fetch_quotes(batch))
+            for symbol in batch:
+                calls[symbol] = self.quote_flight.submit(symbol, functools.partial(self._batch_quote, fetched, symbol))
+        for symbol in missing:
+            if symbol not in calls:
+                calls[symbol] = self.quote_flight.submit(symbol, functools.partial(self._load_quote, symbol))
+
+        results = await asyncio.gather(*(asyncio.shield(call) for call in calls.values()))
+        prices.update(zip(calls, results))
+        return prices
+
+    def fetch_current_prices(self, symbols: list[str]) -> dict[str, float]:
+        """
+        Fetch the current prices of several assets using a single yfinance download.
+        :param symbols: list[str]
+        :return: dict[str, float] with the symbols that could be priced
+        """
+        try:
+            data = yf.download(symbols, period='5d', group_by='ticker', progress=False, threads=True)
+        except Exception as e:
+            logging.error(f'Error fetching asset prices: {e}')
+            return {}
+
+        prices = {}
+        for symbol in symbols:
+            try:
+                if isinstance(data.columns, pd.MultiIndex):
+                    close = data[symbol]['Close']
+                else:
+                    close = data['Close']
+                close = close.dropna()
+                if not close.empty:
+                    prices[symbol] = float(close.iloc[-1])
+            except KeyError:
+                logging.error(f'No price returned for {symbol}')
+        return prices
+
+    def fetch_current_price(self, symbol: str) -> float:
+        """
+        Fetch the current price of an asset using yfinance.
+        :param symbol: str
+        :return: float
+        """
+        try:
+            ticker = yf.Ticker(symbol)
+            return float(ticker.history(period='1d')['Close'].iloc[-1])
+        except Exception as e:
+            logging.error(f'Error fetching asset price: {e}')
+            return 0.0
+
+    async def get_ticker_info(self, symbol: str) -> dict:
+        """
+        Get the descriptive information of a ticker (name, sector, currency...).
+        :param symbol: str
+        :return: dict
+        """
+        return await run_io(self.fetch_ticker_info, symbol)
+
+    def fetch_ticker_info(self, symbol: str) -> dict:
+        """
+        Fetch the descriptive information of a ticker using yfinance.
+        :param symbol: str
+        :return: dict
+        """
+        return yf.Ticker(symbol).info
+
+    async def get_historical_data(self, ticker: str, start_date: str, end_date: Optional[str] = None) -> pd.DataFrame:
+        """
+        Get daily historical data for a given asset (ticker) from the local price history store,
+        downloading only the bars missing from it.
+        :param ticker: Asset symbol (e.g., "AAPL" for Apple).
+        :param start_date: Start date for the historical data (format: YYYY-MM-DD).
+        :param end_date: End date for the historical data (exclusive, format: YYYY-MM-DD), defaults to the latest bar.
+        :return: Pandas DataFrame containing cleaned historical data.
+        """
+        return await run_io(self.load_historical_data, ticker, start_date, end_date)
+
+    def load_historical_data(self, ticker: str, start_date: str, end_date: Optional[str] = None) -> pd.DataFrame:
+        """
+        Refresh the local price history of an asset and return the requested date range.
+        :param ticker: Asset symbol (e.g., "AAPL" for Apple).
+        :param start_date: Start date for the historical data (format: YYYY-MM-DD).
+        :param end_date: End date for the historical data (exclusive, format: YYYY-MM-DD).
+        :return: Pandas DataFrame containing cleaned historical data.
+        """
+        try:
+            self.refresh_history(ticker, start_date)
+        except Exception as e:
+            logging.error(f'Error refreshing historical data for {ticker}: {str(e)}')
+
+        bars = self.price_history.get_range(ticker, start_date, end_date)
+        if len(bars) == 0:
+            return pd.DataFrame()
+        return pd.DataFrame({
+            'Date': bars['date'].astype('datetime64[ns]'),
+            'Open': bars['open'],
+            'High': bars['high'],
+            'Low': bars['low'],
+            'Close': bars['close'],
+            'Volume': bars['volume'],
+        })
+
+    def refresh_history(self, ticker: str, start_date: str) -> None:
+        """
+        Download the bars of an asset that are missing from the local price history store:
+        the whole history for a new symbol, otherwise the head before the first stored bar and the tail
+        since the last stored bar (which is downloaded again, as it may have been an intraday bar).
+        :param ticker: Asset symbol (e.g., "AAPL" for Apple).
+        :param start_date: Start date for the historical data (format: YYYY-MM-DD).
+        """
+        with self.price_history.lock(ticker):
+            bounds = self.price_history.date_bounds(ticker)
+            if bounds is None:
+                self._store_history(ticker, self.fetch_historical_data(ticker, start_date))
+                self._history_start[ticker] = start_date
+                self._history_refreshed_at[ticker] = time.monotonic()
+                return
+
+            first_date, last_date = bounds
+            known_start = self._history_start.get(ticker, str(first_date))
+            if np.datetime64(start_date, 'D') < np.datetime64(known_start, 'D'):
+                self._store_history(ticker, self.fetch_historical_data(ticker, start_date, str(first_date)))
+                self._history_start[ticker] = start_date
+
+            refreshed_at = self._history_refreshed_at.get(ticker, float('-inf'))
+            if time.monotonic() - refreshed_at >= settings.PRICE_HISTORY_REFRESH_SECONDS:
+                self._store_history(ticker, self.fetch_historical_data(ticker, str(last_date)))
+                self._history_refreshed_at[ticker] = time.monotonic()
+
+    def _store_history(self, ticker: str, df: pd.DataFrame) -> None:
+        if df.empty:
+            return
+        bars = np.empty(len(df), dtype=BAR_DTYPE)
+        bars['date'] = df['Date'].values.astype('datetime64[D]')
+        for field in OHLCV_FIELDS:
+            bars[field] = df[field.capitalize()].values
+        self.price_history.upsert(ticker, bars)
+
+    def fetch_historical_data(self, ticker: str, start_date: str, end_date: Optional[str] = None) -> pd.DataFrame:
+        """
+        Fetch and clean historical data for a given asset (ticker) using yfinance.
+        :param ticker: Asset symbol (e.g., "AAPL" for Apple).
+        :param start_date: Start date for the historical data (format: YYYY-MM-DD).
+        :param end_date: End date for the historical data (exclusive, format: YYYY-MM-DD).
+        :return: Pandas DataFrame containing cleaned historical data.
+        """
+        try:
+            # fetch raw data from Yahoo Finance
+            data = yf.download(ticker, start=start_date, end=end_date, group_by="ticker", progress=False)
+
+            # If no data is returned, raise an exception
+            if data.empty:
+                raise ValueError(f'No historical data found for {ticker}...')
+
+            if isinstance(data.columns, pd.MultiIndex):
+                data.columns = data.columns.droplevel(0)  # Remove the first level (e.g., "Price")
+
+            data = data.reset_index()
+            # Ensure 'Date' is a datetime column
+            data['Date'] = pd.to_datetime(data['Date'], errors='coerce')
+            if data['Date'].isna().any():
+                raise ValueError("Some dates are NaT after conversion.")
+
+            # Convert Dataframe and clean data
+            df = data[['Date', 'Open', 'High', 'Low', 'Close', 'Volume']].copy()
+            df['Close'] = df['Close'].ffill() # Fill missing values with the previous day's close price
+            df = df[df['Close'] > 0] # Remove rows with zero or negative close prices
+
+            return df
+        except Exception as e:
+            logging.error(f'Error fetching historical data for {ticker}: {str(e)}')
+            return pd.DataFrame()
+
+    async def _load_quote(self, symbol: str) -> float:
+        price = await self._get_backend_quote(symbol)
+        if price is not None:
+            self.backend_hits += 1
+            self.quote_cache.set(symbol, price)
+            return price
+
+        price = await run_io(self.fetch_current_price, symbol)
+        if price:
+            await self._cache_quote(symbol, price)
+        return price
+
+    async def _fetch_quotes(self, symbols: list[str]) -> dict[str, float]:
+        fetched = await run_io(self.fetch_current_prices, symbols)
+        for symbol, price in fetched.items():
+            if price:
+                await self._cache_quote(symbol, price)
+        return fetched
+
+    @staticmethod
+    async def _batch_quote(fetched: asyncio.Future, symbol: str) -> float:
+        return (await fetched).get(symbol, 0.0)
+
+    async def _get_backend_quote(self, symbol: str) -> Optional[float]:
+        if not self.quote_backend:
+            return None
+        try:
+            return await self.quote_backend.get(symbol)
+        except Exception as e:
+            logging.error(f'Error reading shared quote cache: {e}')
+            return None
+
+    async def _cache_quote(self, symbol: str, price: float) -> None:
+        self.quote_cache.set(symbol, price)
+        if not self.quote_backend:
+            return
+        try:
+            await self.quote_backend.set(symbol, price, self.quote_cache.ttl)
+        except Exception as e:
+            logging.error(f'Error writing shared quote cache: {e}')
+
+    def stats(self) -> dict:
+        """
+        Get the quote cache counters
+        :return: dict
+        """
+        return {
+            **self.quote_cache.stats(),
+            'backend': settings.QUOTE_CACHE_BACKEND,
+            'backend_hits': self.backend_hits,
+            'single_flight': self.quote_flight.stats(),
+        }
+
+
+def _build_quote_backend() -> Optional[CacheBackend]:
+    if settings.QUOTE_CACHE_BACKEND == 'mongo':
+        from app.repository.quote import QuoteRepository
+        return QuoteRepository()
+    return None
+
+
+# The quote cache and the price history store are shared by every request of the worker
+market_data_service = MarketDataService(
+    quote_cache=TTLCache(max_size=settings.QUOTE_CACHE_MAX_SIZE, ttl=settings.QUOTE_CACHE_TTL_SECONDS),
+    price_history=PriceHistoryRepository(settings.PRICE_HISTORY_DIR),
+    quote_backend=_build_quote_backend()
+)
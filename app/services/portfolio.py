@@ -1,33 +1,47 @@
 # Import necessary libraries
+import asyncio
 import logging
 from datetime import datetime, timedelta
+from typing import Optional
 
 import numpy as np
 import pandas as pd
-import yfinance as yf
 from pymongo.results import InsertOneResult
 
 # Import necessary modules App
+from app.core.config import settings
+from app.models.asset import Asset
 from app.models.portfolio import Portfolio
+from app.models.position import Position
 from app.repository.portfolio import PortfolioRepository
+from app.repository.position import PositionRepository
 from app.schemas.asset import AssetUpdate, AssetResponse
 from app.schemas.portfolio import PortfolioResponse, PortfolioUpdate, PortfolioCreate, PortfolioAnalysisResponse, \
     WeightDetail
 from app.schemas.transaction import TransactionResponse
 from app.services.asset import AssetService
+from app.services.market_data import MarketDataService, market_data_service
 
 # Import necessary modules machine learning
-from app.machine_learning.data_processing import prepare_lstm_data
-from app.machine_learning.lstm import build_lstm_model, predict_future_prices
+from app.machine_learning.training import DEFAULT_TRAINING
+from app.machine_learning.worker import ml_worker
 
 
 class PortfolioService:
     """
     Portfolio service class to handle business logic for portfolios in the database
     """
-    def __init__(self, portfolio_repository: PortfolioRepository, asset_service: AssetService):
+    def __init__(
+        self,
+        portfolio_repository: PortfolioRepository,
+        asset_service: AssetService,
+        market_data: MarketDataService = market_data_service,
+        position_repository: Optional[PositionRepository] = None
+    ):
         self.repository = portfolio_repository
         self.asset_service = asset_service
+        self.market_data = market_data
+        self.position_repository = position_repository or PositionRepository()
 
     async def get_all_portfolio(self, current_user_id: str) -> list[PortfolioResponse]:
         """
@@ -153,31 +167,33 @@ class PortfolioService:
         if portfolio['user_id'] != user_id:
             raise ValueError('You do not have permission to view this portfolio...')
 
-        # Get all assets linked to the portfolio
+        # Get all assets linked to the portfolio in a single query
         holdings = []
-        if portfolio['assets']:
-            for asset_id in portfolio['assets']:
-                asset = await self.asset_service.get_asset_by_id(asset_id)
-                holdings.append(asset)
+        if portfolio.get('assets'):
+            holdings, missing = await self.asset_service.get_assets_by_ids(portfolio['assets'])
+            if missing:
+                logging.error(f'Assets of portfolio {portfolio_id} not found: {missing}')
 
         if not holdings:
             raise ValueError('No holdings found for the portfolio...')
 
-        # Return object with the holdings and the portfolio
-        return [AssetResponse(**asset.model_dump()) for asset in holdings]
+        return holdings
 
     async def get_asset_current_price(self, symbol: str) -> float:
         """
-        Fetch the current price of an asset using yfinance.
+        Fetch the current price of an asset, through the shared quote cache.
         :param symbol: str
         :return: float
         """
-        try:
-            ticker = yf.Ticker(symbol)
-            return ticker.history(period='1d')['Close'].iloc[-1]
-        except Exception as e:
-            logging.error(f'Error fetching asset price: {e}')
-            return 0.0
+        return await self.market_data.get_current_price(symbol)
+
+    async def get_assets_current_prices(self, symbols: list[str]) -> dict[str, float]:
+        """
+        Fetch the current prices of several assets in batched requests, through the shared quote cache.
+        :param symbols: list[str]
+        :return: dict[str, float]
+        """
+        return await self.market_data.get_current_prices(symbols)
 
     async def calculate_portfolio_analysis(self, portfolio_id: str, user_id: str):
         """
@@ -187,42 +203,55 @@ class PortfolioService:
         :param user_id: str
         :return:
         """
-        # Fetch all assets linked to the portfolio
-        assets = await self.fetch_portfolio_holdings(portfolio_id, user_id)
-        if not assets:
+        # Check the portfolio, its assets are the holdings
+        portfolio = await self.get_portfolio(portfolio_id, user_id)
+        if not portfolio.assets:
             raise ValueError('No assets found for the portfolio...')
-
-        # Fetch all transactions linked to the portfolio
-        transactions = await self.fetch_all_transactions(portfolio_id, user_id)
-        if not transactions:
+        asset_ids = [str(asset_id) for asset_id in portfolio.assets]
+
+        # Net shares and cost basis of every asset from the position snapshots, with the asset metadata.
+        # The portfolios whose snapshots were not seeded yet aggregate their transactions instead
+        if await self.position_repository.is_initialized(portfolio_id):
+            positions = await self.position_repository.fetch_positions(portfolio_id)
+        else:
+            positions = await self.repository.fetch_positions(portfolio_id)
+        if not positions:
             raise ValueError('No transactions found for the portfolio...')
 
-        # Group transactions by asset
-        transactions_by_asset = {}
-        for transaction in transactions:
-            if transaction.asset_id not in transactions_by_asset:
-                transactions_by_asset[transaction.asset_id] = []
-            transactions_by_asset[transaction.asset_id].append(transaction)
+        # The assets without any transaction are still holdings, with no shares
+        missing_ids = [
+            asset_id for asset_id in asset_ids if asset_id not in positions or positions[asset_id].asset is None
+        ]
+        if missing_ids:
+            assets, not_found = await self.asset_service.get_assets_by_ids(missing_ids)
+            if not_found:
+                logging.error(f'Assets of portfolio {portfolio_id} not found: {not_found}')
+            for asset in assets:
+                position = positions.get(asset.id) or Position(asset_id=asset.id, portfolio_id=portfolio_id)
+                positions[asset.id] = position.model_copy(update={'asset': Asset(**asset.model_dump())})
+
+        positions = [
+            positions[asset_id] for asset_id in asset_ids
+            if asset_id in positions and positions[asset_id].asset is not None
+        ]
+        if not positions:
+            raise ValueError('No assets found for the portfolio...')
+
+        # Fetch the current prices of every asset at once
+        current_prices = await self.get_assets_current_prices([position.asset.symbol for position in positions])
 
-        # Create a list of holdings with the assets and their transactions for DataFrame conversion
+        # Create a list of holdings with the assets and their positions for DataFrame conversion
         holdings = []
-        for asset in assets:
-            asset_transactions = transactions_by_asset.get(asset.id, [])
-            # Calculate total shares and weighted average price for the asset
-            total_shares = sum(tx.shares for tx in asset_transactions)
-            total_cost = sum(tx.shares * tx.price_per_share for tx in asset_transactions)
-            average_price = total_cost / total_shares if total_shares else 0
-
-            # Fetch current price using yfinance
-            current_price = await self.get_asset_current_price(asset.symbol)
+        for position in positions:
+            current_price = current_prices.get(position.asset.symbol, 0.0)
 
             # Calculate total value and weight for the asset
-            current_value = total_shares * current_price
+            current_value = position.shares * current_price
 
             # Append the holding information to the list
             holdings.append({
-                'asset': asset,
-                'quantity': total_shares,
+                'asset': position.asset,
+                'quantity': position.shares,
                 'current_value': current_value,
                 'current_price': current_price
             })
@@ -272,47 +301,32 @@ class PortfolioService:
         """
         predictions = {}
 
-        # Check if the portfolio exists
-        portfolio = await self.get_portfolio(portfolio_id, user_id)
-        if not portfolio:
-            raise ValueError('Portfolio not found...')
-
+        # Check the portfolio and fetch its holdings
         holdings = await self.fetch_portfolio_holdings(portfolio_id, user_id)
         if not holdings:
             raise ValueError('No holdings found for the portfolio...')
 
-        for holding in holdings:
-            try:
-                # Fetch historical prices for the asset
-                df: pd.DataFrame = await self.fetch_historical_data(holding.symbol)
-                if df.empty:
-                    raise ValueError(f'No historical data found for {holding.symbol}...')
-
-                # Extract the closing prices
-                close_prices = df['Close'].values
+        # Fetch historical prices for every asset at once
+        histories = await asyncio.gather(*(self.fetch_historical_data(holding.symbol) for holding in holdings))
 
-                # Prepare the data for LSTM
-                X, _, scaler = prepare_lstm_data(close_prices)
-
-                # Build and train the LSTM model
-                model = build_lstm_model((X.shape[1], 1))
-                model.fit(X, X, epochs=80, batch_size=8, verbose=1)
-
-                model.summary()
-
-                # Predict future prices
-                last_sequence = X[-1] # Last sequence in the dataset
-                holding_predictions = predict_future_prices(model, last_sequence, scaler, days)
-
-                # Convert predictions to native Python types (e.g., float)
-                holding_predictions = [float(pred) for pred in holding_predictions]
+        series = {}
+        for holding, df in zip(holdings, histories):
+            if df.empty:
+                logging.error(f'Error predicting prices for {holding.symbol}: No historical data found')
+                predictions[holding.symbol] = {'error': f'No historical data found for {holding.symbol}...'}
+                continue
 
-                # Store the predictions for the holding
-                predictions[holding.symbol] = holding_predictions
+            # Extract the closing prices and the date of the last one
+            series[holding.symbol] = (df['Close'].values, df['Date'].iloc[-1].strftime('%Y-%m-%d'))
 
+        if series:
+            # Predict future prices of every holding with batched forecasts in the ML worker,
+            # training the models that are stale
+            try:
+                predictions.update(await ml_worker.call('forecast_many', series, days, training=DEFAULT_TRAINING))
             except Exception as e:
-                logging.error(f'Error predicting prices for {holding.symbol}: {str(e)}')
-                predictions[holding.symbol] = {f"error": str(e)}
+                logging.error(f'Error predicting prices for {list(series)}: {str(e)}')
+                predictions.update({symbol: {'error': str(e)} for symbol in series})
 
         return predictions
 
@@ -326,12 +340,7 @@ class PortfolioService:
         :return: List of predicted prices for the asset
         """
         try:
-            # Check if the portfolio exists
-            portfolio = await self.get_portfolio(portfolio_id, user_id)
-            if not portfolio:
-                raise ValueError('Portfolio not found...')
-
-            # Fetch holdings for the portfolio
+            # Check the portfolio and fetch its holdings
             holdings = await self.fetch_portfolio_holdings(portfolio_id, user_id)
             if not holdings:
                 raise ValueError('No holdings found for the portfolio...')
@@ -346,21 +355,14 @@ class PortfolioService:
             if df.empty:
                 raise ValueError(f'No historical data found for {symbol}...')
 
-            # Extract the closing prices
+            # Extract the closing prices and the date of the last one
             close_prices = df['Close'].values
+            data_cutoff = df['Date'].iloc[-1].strftime('%Y-%m-%d')
 
-            # Prepare the data for LSTM
-            X, _, scaler = prepare_lstm_data(close_prices)
-
-            # Build and train the LSTM model
-            model = build_lstm_model((X.shape[1], 1))
-            model.fit(X, X, epochs=80, batch_size=8, verbose=1)
-
-            model.summary()
-
-            # Predict future prices
-            last_sequence = X[-1]  # Last sequence in the dataset
-            predictions = predict_future_prices(model, last_sequence, scaler, days)
+            # Predict future prices with the registered model in the ML worker, training it if stale
+            predictions = await ml_worker.call(
+                'forecast_prices', symbol, close_prices, data_cutoff, days, training=DEFAULT_TRAINING
+            )
 
             # Convert predictions to native Python types (e.g., float)
             predictions = [float(pred) for pred in predictions]
@@ -378,47 +380,13 @@ class PortfolioService:
             logging.error(f'Error predicting prices for {symbol}: {str(e)}')
             return {f"error": str(e)}
 
-    async def fetch_historical_data(self, ticker: str, start_date: str = '2018-01-01', end_date: str = '2024-12-16') -> pd.DataFrame:
+    async def fetch_historical_data(self, ticker: str, start_date: str = settings.PRICE_HISTORY_START, end_date: Optional[str] = None) -> pd.DataFrame:
         """
-        Fetch and clean historical data for a given asset (ticker) using yfinance.
+        Fetch cleaned historical data for a given asset (ticker) from the local price history store,
+        which only downloads the bars it is missing from Yahoo Finance.
         :param ticker: Asset symbol (e.g., "AAPL" for Apple).
         :param start_date: Start date for the historical data (format: YYYY-MM-DD).
-        :param end_date: End date for the historical data (format: YYYY-MM-DD).
+        :param end_date: End date for the historical data (exclusive, format: YYYY-MM-DD), defaults to the latest bar.
         :return: Pandas DataFrame containing cleaned historical data.
         """
-        try:
-            # fetch raw data from Yahoo Finance
-            data = yf.download(ticker, start=start_date, end=end_date, group_by="ticker")  # Ensure proper grouping
-
-            # Debug: Afficher les 5 premières lignes des données téléchargées
-            print("Raw data from yfinance:\n", data.head())
-
-            # If no data is returned, raise an exception
-            if data.empty:
-                raise ValueError(f'No historical data found for {ticker}...')
-
-            if isinstance(data.columns, pd.MultiIndex):
-                print("Detected MultiIndex columns. Flattening...")
-                data.columns = data.columns.droplevel(0)  # Remove the first level (e.g., "Price")
-
-                # Debug: Print columns after flattening
-            print("Columns after flattening:", data.columns)
-
-            data = data.reset_index()
-            # Step 4: Ensure 'Date' is a datetime column
-            data['Date'] = pd.to_datetime(data['Date'], errors='coerce')
-            if data['Date'].isna().any():
-                raise ValueError("Some dates are NaT after conversion.")
-
-            # Convert Dataframe and clean data
-            df = data[['Date', 'Open', 'High', 'Low', 'Close', 'Volume']]
-            df['Close'] = df['Close'].ffill() # Fill missing values with the previous day's close price
-            df = df[df['Close'] > 0] # Remove rows with zero or negative close prices
-
-            # Vérifions la colonne Date après reset_index()
-            print("Data after reset_index():\n", df.head())
-
-            return df
-        except Exception as e:
-            logging.error(f'Error fetching historical data for {ticker}: {str(e)}')
-            return pd.DataFrame()
+        return await self.market_data.get_historical_data(ticker, start_date, end_date)
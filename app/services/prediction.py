@@ -1,14 +1,23 @@
-from datetime import timedelta
+import functools
+from datetime import datetime, timedelta, timezone
 
 import pandas as pd
-from tensorflow.python.keras.callbacks import EarlyStopping
 
+from app.core.config import settings
+from app.models.job import Job
 from app.models.prediction import Prediction
 from app.repository.prediction import PredictionRepository
+from app.services.job import job_service
 from app.services.portfolio import PortfolioService
+from app.utils.singleflight import SingleFlight
 
-from app.machine_learning.lstm import build_lstm_model, predict_future_prices
-from app.machine_learning.data_processing import prepare_lstm_data
+from app.machine_learning.forecasters import get_forecaster
+from app.machine_learning.registry import model_registry
+from app.machine_learning.training import DEFAULT_TRAINING
+from app.machine_learning.worker import ml_worker
+
+# Concurrent requests of the same prediction share one lookup and one forecast, across every request of the worker
+prediction_flight = SingleFlight()
 
 class PredictionService:
     """
@@ -16,26 +25,133 @@ class PredictionService:
     """
     def __init__(self,
                  prediction_repo: PredictionRepository,
-                 portfolio_service: PortfolioService
+                 portfolio_service: PortfolioService,
+                 flight: SingleFlight = prediction_flight
                  ) -> None:
         self.prediction_repo = prediction_repo
         self.portfolio_service = portfolio_service
-
-    async def fetch_prediction_for_symbol(self, symbol: str, period: int) -> dict:
+        self.flight = flight
+
+    async def fetch_prediction_for_symbol(
+        self,
+        symbol: str,
+        period: int,
+        model: str = 'lstm',
+        fallback: bool = True
+    ) -> dict:
         """
         Fetch prediction for a symbol for the next days days.
+        The prediction is computed once for the longest horizon (PREDICTION_MAX_HORIZON) and shorter periods
+        are served as its first days, as the forecast is recursive they are the same as a shorter forecast.
+        Identical concurrent calls (same symbol, horizon and model version) await the same result.
         :param symbol: Stock symbol to predict.
         :param period: Number of days to predict.
+        :param model: "lstm" or the name of a baseline forecaster (ewma, drift, seasonal_naive, ridge).
+        :param fallback: Answer with the PREDICTION_FALLBACK_FORECASTER baseline while the LSTM of a symbol
+                         without any trained model is computed in the background.
         :return: PredictionResponse object.
         """
+        # The same symbol for the flight, the predictions collection and the model registry
+        symbol = symbol.upper()
+        if model != 'lstm':
+            return await self.compute_baseline_prediction(symbol, period, model)
+
+        horizon = max(period, settings.PREDICTION_MAX_HORIZON)
+        key = (symbol, horizon, model_registry.version(symbol), fallback)
+        prediction = await self.flight.do(
+            key, functools.partial(self._fetch_prediction_for_symbol, symbol, horizon, fallback)
+        )
+        return self._first_days(prediction, period)
+
+    @staticmethod
+    def _first_days(prediction: dict, period: int) -> dict:
+        if prediction['predicated_days'] == period:
+            return prediction
+        return {
+            **prediction,
+            'predicated_dates': prediction['predicated_dates'][:period],
+            'predicated_prices': prediction['predicated_prices'][:period],
+            'predicated_days': period,
+        }
+
+    async def _fetch_prediction_for_symbol(self, symbol: str, period: int, fallback: bool) -> dict:
         # Verify if the prediction for the symbol already exists in the database
         prediction_data = await self.prediction_repo.fetch_prediction(symbol, period)
         if prediction_data:
             prediction_data['_id'] = str(prediction_data['_id'])
             prediction = Prediction(**prediction_data)
-            return prediction.model_dump()
+            if prediction.is_fresh():
+                return prediction.model_dump()
+
+            if settings.PREDICTION_STALE_WHILE_REVALIDATE:
+                # Serve the stale prediction right away and refresh it in the background
+                await self.schedule_refresh(symbol, period)
+                return prediction.model_dump()
+
+        if fallback and settings.PREDICTION_FALLBACK_FORECASTER and model_registry.version(symbol) is None:
+            # Training the first model takes a while: answer with a baseline and train it in the background
+            await self.schedule_refresh(symbol, period)
+            return await self.compute_baseline_prediction(symbol, period, settings.PREDICTION_FALLBACK_FORECASTER)
+
+        # If the prediction does not exist or is stale, calculate the new prediction
+        return await self.compute_prediction(symbol, period)
+
+    async def compute_baseline_prediction(self, symbol: str, period: int, model: str) -> dict:
+        """
+        Compute the prediction for a symbol with a baseline forecaster, it is fast enough to not be saved.
+        :param symbol: Stock symbol to predict.
+        :param period: Number of days to predict.
+        :param model: Name of the baseline forecaster.
+        :return: PredictionResponse object.
+        """
+        symbol = symbol.upper()
+        forecaster = get_forecaster(model)
+        df: pd.DataFrame = await self.portfolio_service.fetch_historical_data(symbol)
+        if df.empty:
+            raise ValueError(f'No historical data found for symbol: {symbol}')
+
+        last_date = df['Date'].iloc[-1]
+        predictions = forecaster.forecast(df['Close'].values, period)
+        now = datetime.now(timezone.utc)
+        return {
+            'symbol': symbol,
+            'predicated_dates': self._predicated_dates(last_date, period),
+            'predicated_prices': [float(price) for price in predictions],
+            'predicated_days': period,
+            'model': forecaster.name,
+            'data_cutoff': last_date.strftime('%Y-%m-%d'),
+            'expires_at': None,
+            'created_at': now,
+            'updated_at': now
+        }
 
-        # If the prediction does not exist, calculate the new prediction
+    @staticmethod
+    def _predicated_dates(last_date, period: int) -> list[str]:
+        return [(last_date + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(1, period + 1)]
+
+    async def schedule_refresh(self, symbol: str, period: int) -> Job:
+        """
+        Submit a background job computing a new prediction, unless one is already pending for the symbol and period.
+        The job is internal: it has no owner, so no user can poll it.
+        :param symbol: Stock symbol to predict.
+        :param period: Number of days to predict.
+        :return: Job
+        """
+        symbol = symbol.upper()
+        return await job_service.submit(
+            kind='prediction_refresh',
+            params={'symbol': symbol, 'period': period},
+            run=functools.partial(self.compute_prediction, symbol, period)
+        )
+
+    async def compute_prediction(self, symbol: str, period: int) -> dict:
+        """
+        Compute the prediction for a symbol with the latest historical data and save it.
+        :param symbol: Stock symbol to predict.
+        :param period: Number of days to predict.
+        :return: PredictionResponse object.
+        """
+        symbol = symbol.upper()
         # @TODO: The historical data is split into start and end dates. Need to decide how to handle this.
         # Fetch the historical data for the symbol
         df: pd.DataFrame = await self.portfolio_service.fetch_historical_data(symbol)
@@ -46,47 +162,44 @@ class PredictionService:
         # Get the close prices
         close_prices = df['Close'].values
 
-        # Prepare the data for LSTM
-        X, _, scaler = prepare_lstm_data(close_prices)
-
-        # early_stopping = EarlyStopping(monitor='val_loss', patience=5, verbose=1, restore_best_weights=True, mode='auto')
-
-        # Build and train the LSTM model
-        model = build_lstm_model((X.shape[1], 1))
-        model.fit(X, X, epochs=50, batch_size=16, validation_split=0.2, verbose=1)
-
-        # Get the last sequence from the last look_back days
-        last_sequence = X[-1]
-        predictions = predict_future_prices(
-            model=model,
-            last_sequence=last_sequence,
-            scaler=scaler,
-            period=period
-        )
-
-        # Generate predictions for the next days days
         last_date = df['Date'].iloc[-1]
         # Check if last_date is a NaT and handle it
         if pd.isna(last_date):
             raise ValueError('The last date in the historical data is NaT (Not a Time).')
 
-        predicated_dates = [(last_date + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(1, period + 1)]
+        # Predict from the last look_back days with the registered model, training it if stale, in the ML worker
+        predictions = await ml_worker.call(
+            'forecast_prices',
+            symbol,
+            close_prices,
+            last_date.strftime('%Y-%m-%d'),
+            period,
+            training=DEFAULT_TRAINING
+        )
+
+        # Generate predictions for the next days days
+
+        predicated_dates = self._predicated_dates(last_date, period)
 
-        # Save the prediction to the database
+        # Save the prediction to the database, it is served until it expires then kept as a stale fallback until purged
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=settings.PREDICTION_TTL_SECONDS)
         prediction = Prediction(
             symbol=symbol,
             predicated_dates=predicated_dates,
             predicated_prices=predictions,
             predicated_days=period,
+            data_cutoff=last_date.strftime('%Y-%m-%d'),
+            expires_at=expires_at,
+            purge_at=expires_at + timedelta(seconds=settings.PREDICTION_RETENTION_SECONDS),
         )
 
         result = await self.prediction_repo.save_prediction(prediction.model_dump())
-        prediction_id = str(result.inserted_id)
         if not result.acknowledged:
             raise ValueError('Failed to save prediction to the database.')
 
         # Fetch the saved prediction
-        saved_prediction_data = await self.prediction_repo.fetch_prediction_by_id(prediction_id)
+        saved_prediction_data = await self.prediction_repo.fetch_prediction(symbol, period)
+        saved_prediction_data['_id'] = str(saved_prediction_data['_id'])
 
         saved_prediction = Prediction(**saved_prediction_data)
 
@@ -95,6 +208,9 @@ class PredictionService:
             'predicated_dates': saved_prediction.predicated_dates,
             'predicated_prices': saved_prediction.predicated_prices,
             'predicated_days': saved_prediction.predicated_days,
+            'model': saved_prediction.model,
+            'data_cutoff': saved_prediction.data_cutoff,
+            'expires_at': saved_prediction.expires_at,
             'created_at': saved_prediction.created_at,
             'updated_at': saved_prediction.updated_at
         }
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from app.core.config import settings
+from app.machine_learning.training import SHARED_TRAINING
+from app.machine_learning.worker import ml_worker
+from app.repository.asset import AssetRepository
+from app.repository.lease import LeaseRepository
+from app.services.prediction import PredictionService
+
+
+class ForecastScheduler:
+    """
+    Pre-compute the predictions of every held symbol during off-hours,
+    so the daytime prediction requests are served from the predictions collection.
+    Every API worker runs the schedule, and the daily run is leased in Mongo so only one of them computes it.
+    """
+    def __init__(
+        self,
+        asset_repository: AssetRepository,
+        prediction_service: PredictionService,
+        lease_repository: LeaseRepository,
+        concurrency: int = 2,
+        hour: int = 2
+    ):
+        self.asset_repository = asset_repository
+        self.prediction_service = prediction_service
+        self.lease_repository = lease_repository
+        self.owner = f'{socket.gethostname()}:{os.getpid()}'
+        self.concurrency = concurrency
+        self.hour = hour
+        self.last_run: Optional[dict] = None
+
+    async def run_once(self, horizon: int = settings.PREDICTION_MAX_HORIZON) -> dict:
+        """
+        Refresh the history, retrain the stale models and save the predictions of every held symbol,
+        running at most `concurrency` symbols at a time.
+        :param horizon: Number of days to predict, the shorter periods are served from it.
+        :return: Summary of the run
+        """
+        started_at = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        symbols = await self.asset_repository.fetch_distinct_symbols()
+        if settings.MODEL_TRAINING_MODE == 'shared':
+            await self.train_shared_model(symbols)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        failed = {}
+
+        async def precompute(symbol: str) -> None:
+            async with semaphore:
+                try:
+                    await self.prediction_service.compute_prediction(symbol, horizon)
+                except Exception as e:
+                    logging.error(f'Error pre-computing the prediction of {symbol}: {e}')
+                    failed[symbol] = str(e)
+
+        await asyncio.gather(*(precompute(symbol) for symbol in symbols))
+        self.last_run = {
+            'started_at': started_at.isoformat(),
+            'seconds': round(time.perf_counter() - start, 3),
+            'symbols': len(symbols),
+            'succeeded': len(symbols) - len(failed),
+            'failed': failed,
+        }
+        return self.last_run
+
+    async def train_shared_model(self, symbols: list[str]) -> None:
+        """
+        Train one model on every symbol in a single fit, so the predictions only retrain the symbols it missed.
+        :param symbols: list[str]
+        """
+        histories = await asyncio.gather(
+            *(self.prediction_service.portfolio_service.fetch_historical_data(symbol) for symbol in symbols)
+        )
+        series = {
+            symbol: (df['Close'].values, df['Date'].iloc[-1].strftime('%Y-%m-%d'))
+            for symbol, df in zip(symbols, histories) if not df.empty
+        }
+        try:
+            results = await ml_worker.call('train_shared_model', series, training=SHARED_TRAINING)
+        except ValueError as e:
+            logging.error(f'Error training the shared model: {e}')
+            return
+
+        for symbol, result in results.items():
+            if 'error' in result:
+                logging.error(f'Error training the shared model on {symbol}: {result["error"]}')
+
+    def seconds_until_next_run(self, now: Optional[datetime] = None) -> float:
+        """
+        Get the delay until the next scheduled run, at `hour` UTC
+        :param now: Current time, defaults to now
+        :return: float
+        """
+        now = now or datetime.now(timezone.utc)
+        next_run = now.replace(hour=self.hour, minute=0, second=0, microsecond=0)
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        return (next_run - now).total_seconds()
+
+    async def run_forever(self) -> None:
+        """
+        Run the pre-computation every day at `hour` UTC, until cancelled.
+        The run of a day is skipped if another worker or instance already took its lease.
+        """
+        while True:
+            await asyncio.sleep(self.seconds_until_next_run())
+            key = f'forecast_scheduler:{datetime.now(timezone.utc).date().isoformat()}'
+            try:
+                # The lease outlives the day, so a worker whose clock runs late does not run it again
+                if not await self.lease_repository.acquire(key, self.owner, ttl=2 * 24 * 3600):
+                    logging.info(f'Skipping the pre-computation of the predictions, {key} is leased by another worker')
+                    continue
+                summary = await self.run_once()
+                logging.info(f'Pre-computed the predictions of {summary["succeeded"]}/{summary["symbols"]} symbols')
+            except Exception as e:
+                logging.error(f'Error pre-computing the predictions: {e}')
@@ -1,12 +1,13 @@
 from datetime import datetime
-
-import yfinance as yf
+from typing import Optional
 
 from app.models.asset import Asset
+from app.repository.position import PositionRepository
 from app.repository.transaction import TransactionRepository
 from app.schemas.asset import AssetResponse, AssetCreate
 from app.schemas.transaction import TransactionResponse, TransactionBase, TransactionCreate, TransactionUpdate
 from app.services.asset import AssetService
+from app.services.market_data import MarketDataService, market_data_service
 from app.services.portfolio import PortfolioService
 from app.models.transaction import Transaction
 
@@ -19,10 +20,29 @@ class TransactionService:
         self,
         repository: TransactionRepository,
         portfolio_service: PortfolioService,
-        asset_service: AssetService):
+        asset_service: AssetService,
+        market_data: MarketDataService = market_data_service,
+        position_repository: Optional[PositionRepository] = None):
         self.repository = repository
         self.portfolio_service = portfolio_service
         self.asset_service = asset_service
+        self.market_data = market_data
+        self.position_repository = position_repository or PositionRepository()
+
+    async def apply_to_position(self, transaction: Transaction, sign: int, count: int) -> None:
+        """
+        Add (sign=1) or remove (sign=-1) the shares and cost of a transaction to the snapshot of its position
+        :param transaction: Transaction
+        :param sign: 1 or -1
+        :param count: Number of transactions added to the position (1 on create, -1 on delete, 0 on update)
+        """
+        await self.position_repository.apply_delta(
+            transaction.portfolio_id,
+            transaction.asset_id,
+            sign * transaction.shares,
+            sign * transaction.shares * transaction.price_per_share,
+            count
+        )
 
     async def create_transaction(self,
                                  portfolio_id: str,
@@ -44,8 +64,7 @@ class TransactionService:
         asset: Asset = await self.asset_service.get_asset_by_symbol(transaction.symbol)
         asset_id = None
         if not asset:
-            ticker = yf.Ticker(transaction.symbol)
-            ticker_info = ticker.info
+            ticker_info = await self.market_data.get_ticker_info(transaction.symbol)
 
             add_new_asset = AssetCreate(
                 symbol=ticker_info.get('symbol'),
@@ -66,7 +85,9 @@ class TransactionService:
         transaction.portfolio_id = portfolio_id
         transaction_data = Transaction(**transaction.model_dump(exclude={'symbol'}))
 
+        await self.position_repository.ensure_initialized(portfolio_id)
         result = await self.repository.add_transaction(transaction_data)
+        await self.apply_to_position(transaction_data, 1, 1)
         transaction.id = str(result.inserted_id)
         return TransactionResponse(**transaction.model_dump())
 
@@ -107,7 +128,26 @@ class TransactionService:
         if not transaction:
             raise ValueError('Transaction not found')
 
-        updated_transaction = await self.repository.update_transaction(transaction_id, transaction_data.model_dump(exclude_unset=True))
+        changes = transaction_data.model_dump(exclude_unset=True)
+        # Both portfolios of a moved transaction are seeded before it is written
+        await self.position_repository.ensure_initialized(transaction.portfolio_id)
+        if changes.get('portfolio_id') and changes['portfolio_id'] != transaction.portfolio_id:
+            await self.position_repository.ensure_initialized(changes['portfolio_id'])
+        updated_transaction = await self.repository.update_transaction(transaction_id, changes)
+
+        # Move the position by the difference between the new and the old transaction
+        updated = Transaction(**updated_transaction)
+        if (updated.portfolio_id, updated.asset_id) == (transaction.portfolio_id, transaction.asset_id):
+            await self.position_repository.apply_delta(
+                updated.portfolio_id,
+                updated.asset_id,
+                updated.shares - transaction.shares,
+                updated.shares * updated.price_per_share - transaction.shares * transaction.price_per_share,
+                0
+            )
+        else:
+            await self.apply_to_position(transaction, -1, -1)
+            await self.apply_to_position(updated, 1, 1)
         return TransactionResponse(**updated_transaction)
 
     async def delete_transaction(
@@ -130,4 +170,6 @@ class TransactionService:
         if not transaction:
             raise ValueError('Transaction not found')
 
+        await self.position_repository.ensure_initialized(transaction.portfolio_id)
         await self.repository.delete_transaction(transaction_id)
+        await self.apply_to_position(transaction, -1, -1)
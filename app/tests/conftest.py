@@ -0,0 +1,5 @@
+import os
+
+# The settings are read when the app modules are imported
+os.environ.setdefault('ACCESS_TOKEN_EXPIRE_MINUTES', '30')
+os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '3')
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from app.machine_learning.backtest import BacktestConfig, backtest_symbol, run_backtest, walk_forward_origins
+from app.machine_learning.search import pareto_front, select
+from app.repository.price_history import BAR_DTYPE, PriceHistoryRepository
+
+CONFIG = BacktestConfig(horizon=5, folds=3, step=10, min_train=50)
+
+
+@pytest.fixture
+def root(tmp_path):
+    # A straight line, the drift forecaster predicts it exactly
+    bars = np.zeros(100, dtype=BAR_DTYPE)
+    bars['date'] = np.arange('2024-01-01', 100, dtype='datetime64[D]')
+    bars['close'] = 100 + np.arange(100, dtype=np.float64)
+    PriceHistoryRepository(str(tmp_path)).upsert('LINE', bars)
+    return str(tmp_path)
+
+
+def test_walk_forward_origins():
+    assert walk_forward_origins(100, CONFIG) == [75, 85, 95]
+    assert walk_forward_origins(60, CONFIG) == [55]
+    assert walk_forward_origins(40, CONFIG) == []
+
+
+def test_backtest_symbol_scores_every_fold(root):
+    result = backtest_symbol(root, 'LINE', 'drift', CONFIG)
+
+    assert result['folds'] == 3
+    assert result['RMSE'] == pytest.approx(0, abs=1e-9)
+    assert result['MAE'] == pytest.approx(0, abs=1e-9)
+    assert result['max_rss_mb'] > 0
+
+
+def test_backtest_symbol_without_enough_prices(root):
+    result = backtest_symbol(root, 'LINE', 'drift', BacktestConfig(min_train=200))
+
+    assert result['folds'] == 0
+    assert 'error' in result
+
+
+def test_run_backtest(root):
+    report = run_backtest(['drift', 'ewma'], config=CONFIG, root=root, workers=1)
+
+    assert [result['forecaster'] for result in report['results']] == ['drift', 'ewma']
+    assert report['summary']['drift']['RMSE'] == pytest.approx(0, abs=1e-9)
+    assert report['summary']['ewma']['RMSE'] > 0
+
+
+def test_select_prefers_the_smallest_accurate_configuration():
+    scores = [
+        {'name': 'large', 'RMSE': 1.00, 'fit_seconds': 10, 'parameters': 1000, 'predict_ms': 1},
+        {'name': 'small', 'RMSE': 1.01, 'fit_seconds': 2, 'parameters': 100, 'predict_ms': 1},
+        {'name': 'dominated', 'RMSE': 1.50, 'fit_seconds': 20, 'parameters': 2000, 'predict_ms': 2},
+    ]
+
+    front = pareto_front(scores)
+
+    assert [candidate['name'] for candidate in front] == ['large', 'small']
+    assert select(front, tolerance=0.02)['name'] == 'small'
+    assert select(front, tolerance=0.0)['name'] == 'large'
@@ -0,0 +1,134 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from app.models.transaction import Transaction
+from app.repository.position import PositionRepository
+from app.repository.transaction import TransactionRepository
+from app.schemas.transaction import TransactionCreate, TransactionUpdate
+from app.services.transaction import TransactionService
+
+
+class PortfolioServiceStub:
+    async def get_portfolio(self, portfolio_id: str, user_id: str):
+        return {'id': portfolio_id}
+
+
+class AssetServiceStub:
+    async def get_asset_by_symbol(self, symbol: str):
+        return {'_id': f'asset-{symbol}'}
+
+
+@pytest.fixture
+def database():
+    return AsyncMongoMockClient()['app_testing']
+
+
+@pytest.fixture
+def positions(database):
+    repository = PositionRepository()
+    repository.collection = database['positions']
+    repository.transaction_collection = database['transactions']
+    repository.marker_collection = database['position_portfolios']
+    return repository
+
+
+@pytest.fixture
+def service(database, positions):
+    repository = TransactionRepository()
+    repository.collection = database['transactions']
+    return TransactionService(repository, PortfolioServiceStub(), AssetServiceStub(), position_repository=positions)
+
+
+def transaction(symbol: str, shares: float, price: float) -> TransactionCreate:
+    return TransactionCreate(
+        symbol=symbol, transaction_type='buy', created_at=datetime.now(timezone.utc), shares=shares,
+        price_per_share=price, total_value=shares * price, currency='USD', fees=0.0, notes=None
+    )
+
+
+async def snapshots(positions: PositionRepository, portfolio_id: str) -> dict:
+    return {
+        position.asset_id: (position.shares, position.cost_basis, position.transactions)
+        for position in await positions.fetch_snapshots(portfolio_id)
+    }
+
+
+@pytest.mark.asyncio
+async def test_first_write_seeds_the_portfolio_from_its_ledger(database, positions, service):
+    # A transaction written before the snapshots existed
+    legacy = transaction('AAA', 2, 10.0)
+    legacy.asset_id, legacy.portfolio_id = 'asset-AAA', 'p1'
+    await database['transactions'].insert_one(Transaction(**legacy.model_dump(exclude={'symbol'})).model_dump())
+    assert not await positions.is_initialized('p1')
+
+    await service.create_transaction('p1', 'u1', transaction('AAA', 3, 20.0))
+
+    assert await positions.is_initialized('p1')
+    assert await snapshots(positions, 'p1') == {'asset-AAA': (5, 80.0, 2)}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_writes_count_every_transaction_once(positions, service):
+    add_transaction = service.repository.add_transaction
+
+    async def slow_add_transaction(transaction: Transaction):
+        # Let the other writers run between the writes, as a real database does
+        await asyncio.sleep(0.01)
+        result = await add_transaction(transaction)
+        await asyncio.sleep(0.01)
+        return result
+
+    service.repository.add_transaction = slow_add_transaction
+    await asyncio.gather(*(service.create_transaction('p1', 'u1', transaction('AAA', 1, 10.0)) for _ in range(5)))
+
+    assert await snapshots(positions, 'p1') == {'asset-AAA': (5, 50.0, 5)}
+    assert (await positions.verify('p1'))['mismatches'] == []
+
+
+@pytest.mark.asyncio
+async def test_update_moves_the_transaction_between_portfolios(positions, service):
+    created = await service.create_transaction('p1', 'u1', transaction('AAA', 4, 10.0))
+    await service.create_transaction('p2', 'u1', transaction('AAA', 1, 10.0))
+
+    await service.update_transaction('p1', 'u1', created.id, TransactionUpdate(portfolio_id='p2', shares=2))
+
+    assert await snapshots(positions, 'p1') == {}
+    assert await snapshots(positions, 'p2') == {'asset-AAA': (3, 30.0, 2)}
+    assert (await positions.verify())['mismatches'] == []
+
+
+@pytest.mark.asyncio
+async def test_update_in_place_applies_the_difference(positions, service):
+    created = await service.create_transaction('p1', 'u1', transaction('AAA', 4, 10.0))
+
+    await service.update_transaction('p1', 'u1', created.id, TransactionUpdate(shares=6, price_per_share=5.0))
+
+    assert await snapshots(positions, 'p1') == {'asset-AAA': (6, 30.0, 1)}
+
+
+@pytest.mark.asyncio
+async def test_delete_removes_the_position_of_the_last_transaction(positions, service):
+    first = await service.create_transaction('p1', 'u1', transaction('AAA', 4, 10.0))
+    second = await service.create_transaction('p1', 'u1', transaction('AAA', 1, 20.0))
+
+    await service.delete_transaction('p1', 'u1', first.id)
+    assert await snapshots(positions, 'p1') == {'asset-AAA': (1, 20.0, 1)}
+
+    await service.delete_transaction('p1', 'u1', second.id)
+    assert await snapshots(positions, 'p1') == {}
+
+
+@pytest.mark.asyncio
+async def test_rebuild_matches_the_incremental_updates(positions, service):
+    for portfolio_id, symbol, shares, price in [('p1', 'AAA', 3, 10.0), ('p1', 'BBB', 2, 7.5),
+                                                ('p1', 'AAA', -1, 12.0), ('p2', 'AAA', 5, 11.0)]:
+        await service.create_transaction(portfolio_id, 'u1', transaction(symbol, shares, price))
+    incremental = {portfolio_id: await snapshots(positions, portfolio_id) for portfolio_id in ('p1', 'p2')}
+
+    await positions.rebuild()
+
+    assert {portfolio_id: await snapshots(positions, portfolio_id) for portfolio_id in ('p1', 'p2')} == incremental
+    assert (await positions.verify())['mismatches'] == []
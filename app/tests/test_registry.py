@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from app.machine_learning import lstm
+from app.machine_learning.registry import ModelKey, ModelRegistry
+from app.machine_learning.training import LSTMArchitecture, TrainingConfig
+
+ARCHITECTURE = LSTMArchitecture(units=(4,), dropout=0.0, dense_units=2)
+TRAINING = TrainingConfig(max_epochs=1, patience=1, batch_size=32, validation_split=0.0)
+LOOK_BACK = 5
+CUTOFF = '2024-01-31'
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    registry = ModelRegistry(root=str(tmp_path))
+    monkeypatch.setattr(lstm, 'model_registry', registry)
+    return registry
+
+
+def prices(seed: int) -> np.ndarray:
+    return 100 + np.cumsum(np.random.default_rng(seed).normal(size=60))
+
+
+def weights(model) -> list[np.ndarray]:
+    return [np.array(weight) for weight in model.get_weights()]
+
+
+def test_shared_fits_with_the_same_cutoff_keep_their_own_weights(registry, tmp_path):
+    portfolios = [{'AAA': (prices(0), CUTOFF), 'BBB': (prices(1), CUTOFF)},
+                  {'CCC': (prices(2), CUTOFF), 'DDD': (prices(3), CUTOFF)}]
+    trained = {}
+    for series in portfolios:
+        lstm.train_shared_model(series, TRAINING, LOOK_BACK, ARCHITECTURE)
+        for symbol in series:
+            model, _ = registry.get(ModelKey(symbol, LOOK_BACK, ARCHITECTURE.name, CUTOFF))
+            trained[symbol] = weights(model)
+
+    shared_keys = {
+        registry.metadata(ModelKey(symbol, LOOK_BACK, ARCHITECTURE.name, CUTOFF))['shared_model']['data_cutoff']
+        for symbol in trained
+    }
+    assert len(shared_keys) == 2
+
+    # Load every model from disk
+    reloaded = ModelRegistry(root=str(tmp_path))
+    for symbol, expected in trained.items():
+        model, _ = reloaded.get(ModelKey(symbol, LOOK_BACK, ARCHITECTURE.name, CUTOFF))
+        for actual, weight in zip(weights(model), expected):
+            np.testing.assert_array_equal(actual, weight)
+
+
+def test_save_of_an_existing_key_returns_the_model_on_disk(registry, tmp_path):
+    key = ModelKey('AAA', LOOK_BACK, ARCHITECTURE.name, CUTOFF)
+    first = lstm.build_lstm_model((LOOK_BACK, 1), ARCHITECTURE)
+    second = lstm.build_lstm_model((LOOK_BACK, 1), ARCHITECTURE)
+    registry.save(key, first, {'data_min': 1.0, 'data_max': 2.0})
+
+    model, metadata = registry.save(key, second, {'data_min': 3.0, 'data_max': 4.0})
+
+    assert metadata['data_min'] == 1.0
+    for actual, weight in zip(weights(model), weights(first)):
+        np.testing.assert_array_equal(actual, weight)
+    cached, _ = registry.get(key)
+    assert cached is model
@@ -0,0 +1,69 @@
+import asyncio
+import functools
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical calls: while a call is in flight for a key,
+    every other caller with the same key awaits its result instead of running it again.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.shared = 0
+
+    def in_flight(self, key: Hashable) -> bool:
+        """
+        Check if a call is running for a key
+        :param key: Hashable
+        :return: bool
+        """
+        return key in self._calls
+
+    def submit(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        """
+        Start a call for a key, or get the call already in flight for it.
+        :param key: Hashable
+        :param func: Coroutine function running the call, only called if no call is in flight
+        :return: asyncio.Future of the shared call
+        """
+        call = self._calls.get(key)
+        if call is not None:
+            self.shared += 1
+            return call
+
+        self.calls += 1
+        call = asyncio.ensure_future(func())
+        self._calls[key] = call
+        call.add_done_callback(functools.partial(self._forget, key))
+        return call
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run a call for a key, sharing its result with the concurrent callers of the same key.
+        A caller that is cancelled stops waiting without cancelling the call for the others.
+        :param key: Hashable
+        :param func: Coroutine function running the call
+        :return: The result of the call
+        """
+        return await asyncio.shield(self.submit(key, func))
+
+    def _forget(self, key: Hashable, call: asyncio.Future) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call.cancelled():
+            # Mark the exception as retrieved, even if every caller stopped waiting
+            call.exception()
+
+    def stats(self) -> dict:
+        """
+        Get the single-flight counters
+        :return: dict
+        """
+        return {
+            'in_flight': len(self._calls),
+            'calls': self.calls,
+            'shared': self.shared,
+        }
@@ -0,0 +1,127 @@
+"""
+  Training benchmark of the LSTM models.
+  Trains the per-symbol models (one fit per symbol) and the shared model (one fit on the stacked windows of every
+  symbol) on the same prices, and reports the wall-clock time and the accuracy of the one-day predictions on the
+  validation windows of every symbol.
+
+  Usage: python -m benchmarks.batched_training [--symbols 16] [--epochs 10] [--prices data/prices]
+"""
+import argparse
+import dataclasses
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from app.core.config import settings
+
+
+def synthetic_series(symbols: int, days: int, seed: int = 0) -> dict:
+    """
+    Generate geometric random walks standing for the closing prices of several symbols
+    :param symbols: Number of symbols
+    :param days: Number of prices per symbol
+    :param seed: Random seed
+    :return: Dictionary mapping each symbol to a tuple (closing prices, date of the last closing price)
+    """
+    rng = np.random.default_rng(seed)
+    series = {}
+    for index in range(symbols):
+        returns = rng.normal(0.0003, 0.02, days)
+        series[f'SYN{index}'] = (100 * np.exp(np.cumsum(returns)), '2024-01-01')
+    return series
+
+
+def stored_series(root: str, symbols: int) -> dict:
+    """
+    Read the closing prices of the symbols of the local price history store
+    :param root: Directory of the price history store
+    :param symbols: Maximum number of symbols
+    :return: Dictionary mapping each symbol to a tuple (closing prices, date of the last closing price)
+    """
+    from app.repository.price_history import PriceHistoryRepository
+
+    repository = PriceHistoryRepository(root)
+    series = {}
+    for file_name in sorted(os.listdir(root))[:symbols]:
+        symbol = file_name.removesuffix('.npy')
+        bars = repository.load(symbol)
+        if bars is not None and len(bars):
+            series[symbol] = (np.asarray(bars['close']), str(bars['date'][-1]))
+    return series
+
+
+def evaluate(series: dict, look_back: int, validation_split: float) -> dict:
+    """
+    Predict the validation windows of every symbol with its registered model and average the metrics
+    :return: dict with the mean RMSE, MAE and R2 over the symbols
+    """
+    from app.machine_learning.data_processing import prepare_lstm_data, scaler_from_bounds
+    from app.machine_learning.lstm import DEFAULT_ARCHITECTURE, evaluate_model
+    from app.machine_learning.registry import model_registry
+
+    metrics = []
+    for symbol, (close_prices, _) in series.items():
+        model, metadata = model_registry.get(model_registry.latest(symbol, look_back, DEFAULT_ARCHITECTURE.name))
+        scaler = scaler_from_bounds(metadata['data_min'], metadata['data_max'])
+        X, Y, _ = prepare_lstm_data(close_prices, look_back)
+        split = len(X) - int(len(X) * validation_split)
+        metrics.append(evaluate_model(model, X[split:], Y[split:], scaler))
+    return {name: float(np.mean([metric[name] for metric in metrics])) for name in ('RMSE', 'MAE', 'R2')}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Compare the per-symbol and the shared LSTM training')
+    parser.add_argument('--symbols', type=int, default=16)
+    parser.add_argument('--days', type=int, default=1500, help='Prices per synthetic symbol')
+    parser.add_argument('--prices', help='Price history store to read the prices from, instead of synthetic prices')
+    parser.add_argument('--epochs', type=int, default=10)
+    parser.add_argument('--patience', type=int, default=5)
+    parser.add_argument('--batch-size', type=int, default=8, help='Batch size of the per-symbol fits')
+    parser.add_argument('--shared-batch-size', type=int, default=settings.MODEL_SHARED_BATCH_SIZE)
+    parser.add_argument('--validation-split', type=float, default=0.2)
+    parser.add_argument('--look-back', type=int, default=60)
+    args = parser.parse_args()
+
+    series = stored_series(args.prices, args.symbols) if args.prices else synthetic_series(args.symbols, args.days)
+
+    from app.machine_learning import lstm
+    from app.machine_learning.registry import model_registry
+    from app.machine_learning.training import TrainingConfig
+
+    training = TrainingConfig(
+        max_epochs=args.epochs,
+        patience=args.patience,
+        batch_size=args.batch_size,
+        validation_split=args.validation_split
+    )
+
+    results = {}
+    for mode in ('per_symbol', 'shared'):
+        # Every mode trains into an empty registry
+        model_registry.root = tempfile.mkdtemp(prefix=f'benchmark-{mode}-')
+        model_registry._models.clear()
+
+        start = time.perf_counter()
+        if mode == 'shared':
+            lstm.train_shared_model(
+                series, dataclasses.replace(training, batch_size=args.shared_batch_size), args.look_back
+            )
+        else:
+            for symbol, (close_prices, data_cutoff) in series.items():
+                lstm.get_or_train_model(symbol, close_prices, data_cutoff, training, args.look_back)
+        seconds = time.perf_counter() - start
+        results[mode] = {'seconds': seconds, **evaluate(series, args.look_back, args.validation_split)}
+
+    print(f'{len(series)} symbols, {args.epochs} epochs')
+    for mode, result in results.items():
+        print(f"{mode}: {result['seconds']:.1f}s, RMSE {result['RMSE']:.3f}, "
+              f"MAE {result['MAE']:.3f}, R2 {result['R2']:.3f}")
+    print(f"speedup: {results['per_symbol']['seconds'] / results['shared']['seconds']:.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
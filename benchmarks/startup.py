@@ -0,0 +1,72 @@
+"""
+  Startup benchmark of the API process.
+  Imports app.main in fresh interpreters, reports the import time and the peak RSS,
+  and fails if TensorFlow was imported, as the ML stack must only be loaded by the ML worker processes.
+
+  Usage: python -m benchmarks.startup [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = '''
+import json, resource, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    'seconds': elapsed,
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'tensorflow_loaded': 'tensorflow' in sys.modules,
+}}))
+'''
+
+
+def measure(module: str, runs: int) -> dict:
+    """
+    Import a module in fresh interpreters and aggregate the measures
+    :param module: Dotted module path
+    :param runs: Number of interpreters to start
+    :return: dict
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE.format(module=module)],
+            cwd=root, capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        'module': module,
+        'median_seconds': statistics.median(sample['seconds'] for sample in samples),
+        'max_rss_mb': max(sample['max_rss_mb'] for sample in samples),
+        'tensorflow_loaded': any(sample['tensorflow_loaded'] for sample in samples),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Measure the startup time of the API process')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--compare-ml', action='store_true', help='Also measure the import of the ML stack')
+    args = parser.parse_args()
+
+    results = [measure('app.main', args.runs)]
+    if args.compare_ml:
+        results.append(measure('app.machine_learning.lstm', args.runs))
+
+    for result in results:
+        print(f"{result['module']}: {result['median_seconds']:.2f}s, "
+              f"{result['max_rss_mb']:.0f} MB RSS, tensorflow loaded: {result['tensorflow_loaded']}")
+
+    if results[0]['tensorflow_loaded']:
+        print('The API process imports TensorFlow')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())